@@ -1,11 +1,24 @@
+import io
 import os
 import xml.etree.ElementTree as ElementTree
 from collections import OrderedDict
-from decimal import Decimal
+from decimal import Context, Decimal
+from functools import lru_cache
 from nifpga import DataType
 from numbers import Number
 from warnings import warn
 import ctypes
+try:
+    import numpy
+except ImportError:
+    # numpy is optional. It speeds up unpacking arrays of numerics when
+    # available.
+    numpy = None
+
+# numpy.unpackbits only takes the count and bitorder arguments the array
+# unpacking uses from numpy 1.17 on.
+_numpy_can_unpack_bits = (numpy is not None
+                          and numpy.lib.NumpyVersion(numpy.__version__) >= "1.17.0")
 
 
 class Bitfile(object):
@@ -18,10 +31,14 @@ class Bitfile(object):
     def __init__(self, filepath, parse_contents=False):
         if parse_contents:
             self._filepath = None
-            tree = ElementTree.fromstring(filepath)
+            if isinstance(filepath, bytes):
+                contents = io.BytesIO(filepath)
+            else:
+                contents = io.StringIO(filepath)
+            tree = _parse_bitfile_xml(contents)
         else:
             self._filepath = os.path.abspath(filepath)
-            tree = ElementTree.ElementTree().parse(self._filepath)
+            tree = _parse_bitfile_xml(self._filepath)
 
         self._signature = tree.find("SignatureRegister").text.upper()
 
@@ -85,6 +102,31 @@ class Bitfile(object):
         return self._base_address_on_device
 
 
+# The only top level elements of a .lvbitx file that Bitfile reads
+_USED_BITFILE_ELEMENTS = frozenset(("SignatureRegister", "VI", "Project"))
+
+
+def _parse_bitfile_xml(source):
+    """ Parses the XML from a path or file object and returns the root element.
+
+    Top level elements Bitfile doesn't use are cleared as soon as they have
+    been parsed, so the bitstream, which makes up most of a real bitfile,
+    isn't kept in memory.
+    """
+    root = None
+    depth = 0
+    for event, element in ElementTree.iterparse(source, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = element
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 1 and element.tag not in _USED_BITFILE_ELEMENTS:
+                element.clear()
+    return root
+
+
 class UnsupportedTypeError(RuntimeError):
     pass
 
@@ -281,21 +323,44 @@ class ClusterMustContainUniqueNames(RuntimeError):
     pass
 
 
+_cluster_unpack_data_template = """
+def unpack_data(data):
+    return OrderedDict((
+%(members)s    ))
+"""
+
+
 class _Cluster(_BaseType):
     """ Handles packing and unpacking clusters. """
     def __init__(self, name, type_xml):
         super(_Cluster, self).__init__(name)
         self._datatype = DataType.Cluster
         member_types = type_xml.find("TypeList")
-        self._children = []
-        names = set()
-        for child in list(member_types):
-            child_type = _parse_type(child)
-            if child_type.name in names:
-                raise ClusterMustContainUniqueNames("Cluster: '%s', contains multiple members with the name: '%s'" % (self._name, child_type.name))
-            names.add(child_type.name)
-            self._children.append(_parse_type(child))
+        self._children = [_parse_type(child) for child in member_types]
+        names = [child.name for child in self._children]
+        if len(set(names)) != len(names):
+            duplicate = next(name for index, name in enumerate(names) if name in names[:index])
+            raise ClusterMustContainUniqueNames("Cluster: '%s', contains multiple members with the name: '%s'" % (self._name, duplicate))
         self._size_in_bits = sum(child.size_in_bits for child in self._children)
+        # The first member is the most significant, so precompute where
+        # each member starts counting from the least significant bit.
+        layout = []
+        offset = self._size_in_bits
+        for child in self._children:
+            offset -= child.size_in_bits
+            layout.append((child, offset))
+        self._layout = tuple(layout)
+        self._unpack_data = self._make_unpack_data()
+
+    def __getstate__(self):
+        # the generated function can't be pickled, so it is rebuilt instead
+        state = self.__dict__.copy()
+        del state["_unpack_data"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._unpack_data = self._make_unpack_data()
 
     @property
     def datatype(self):
@@ -309,31 +374,44 @@ class _Cluster(_BaseType):
     def is_c_api_type(self):
         return False
 
-    def _unpack_data_recursive(self, data, result, child_iter):
-        """ Clusters are stored in the correct order in the blob, but since we
-        parse the blob from least significant to most, we are parsing the clusters
-        out backwards. So parse out the data backwards going down the stack and
-        add it to the dict going back up the stack. This way we insert into the
-        OrderedDict in the correct order"""
-        child = next(child_iter, None)
-        if child is None:
-            return
-        current_result = child.unpack_data(data)
-        data >>= child.size_in_bits
-        self._unpack_data_recursive(data, result, child_iter)
-        result[child.name] = current_result
+    def _make_unpack_data(self):
+        """ Generates an unpack_data specialized to this cluster's layout.
+
+        The offset of each member is known once the cluster is parsed, so
+        the generated function shifts the data straight to each member,
+        extracts unsigned numerics and booleans inline, and builds the
+        OrderedDict in member order in one go.
+        """
+        namespace = {"OrderedDict": OrderedDict}
+        members = []
+        for index, (child, offset) in enumerate(self._layout):
+            shifted = "(data >> %d)" % offset if offset else "data"
+            if type(child) is _Numeric and not child._signed:
+                value = "%s & 0x%x" % (shifted, child._data_mask)
+            elif type(child) is _Bool:
+                value = "%s & 1 == 1" % shifted
+            else:
+                namespace["unpack_%d" % index] = child.unpack_data
+                value = "unpack_%d(%s)" % (index, shifted)
+            members.append("        (%r, %s),\n" % (child.name, value))
+        source = _cluster_unpack_data_template % {"members": "".join(members)}
+        exec(compile(source, "<unpack cluster %r>" % self._name, "exec"), namespace)
+        return namespace["unpack_data"]
 
     def unpack_data(self, data):
-        result = OrderedDict()
-        self._unpack_data_recursive(data, result, reversed(self._children))
-        return result
+        return self._unpack_data(data)
 
     def pack_data(self, data_to_pack, packed_data):
-        i = 0
-        for child in self._children:
-            packed_data = child.pack_data(data_to_pack[child.name], packed_data)
-            i += 1
-        return packed_data
+        # Pack each member on its own and put it in place, rather than
+        # shifting everything packed so far over for every member.
+        packed_cluster = 0
+        for child, offset in self._layout:
+            packed_cluster |= child.pack_data(data_to_pack[child.name], 0) << offset
+        return (packed_data << self._size_in_bits) | packed_cluster
+
+
+# Smallest array of non numeric elements that is unpacked with numpy.
+_numpy_minimum_array_size = 64
 
 
 class _Array(_BaseType):
@@ -343,6 +421,23 @@ class _Array(_BaseType):
         self._subtype = _parse_type(list(type_xml.find("Type"))[0])
         self._size = int(type_xml.find("Size").text)
         self._size_in_bits = self._subtype.size_in_bits * self._size
+        self._data_mask = (1 << self._size_in_bits) - 1
+        # Numerics are all whole bytes wide, so an array of them can be
+        # decoded in one go from the little endian bytes of the packed data.
+        self._numpy_dtype = None
+        # Other elements of up to 64 bits can be split out of the packed data
+        # bit by bit with numpy, and each summed into a uint64 using these
+        # weights.  That has some fixed overhead, so is only done for arrays
+        # large enough for it to be cheaper than shifting element by element.
+        self._numpy_bit_weights = None
+        if numpy is not None:
+            if type(self._subtype) is _Numeric:
+                self._numpy_dtype = numpy.dtype("<%s%d" % ("i" if self._subtype._signed else "u",
+                                                           self._subtype.size_in_bits // 8))
+            elif (_numpy_can_unpack_bits and 0 < self._subtype.size_in_bits <= 64
+                  and self._size >= _numpy_minimum_array_size):
+                self._numpy_bit_weights = numpy.left_shift(numpy.uint64(1),
+                                                           numpy.arange(self._subtype.size_in_bits, dtype=numpy.uint64))
 
     @property
     def datatype(self):
@@ -361,6 +456,16 @@ class _Array(_BaseType):
         return self._subtype.is_c_api_type
 
     def unpack_data(self, data):
+        if self._numpy_dtype is not None:
+            packed_bytes = (data & self._data_mask).to_bytes(self._size_in_bits // 8, "little")
+            # The last element is in the least significant bytes, so reverse.
+            return numpy.frombuffer(packed_bytes, dtype=self._numpy_dtype)[::-1].tolist()
+        if self._numpy_bit_weights is not None:
+            elements = self._split_elements(data)
+            if type(self._subtype) is _FXP:
+                return self._subtype.unpack_many(elements)
+            unpack_element = self._subtype.unpack_data
+            return [unpack_element(element) for element in elements.tolist()]
         results = [0] * self._size
         for i in range(0, self._size):
             results[i] = self._subtype.unpack_data(data)
@@ -370,12 +475,39 @@ class _Array(_BaseType):
         results.reverse()
         return results
 
+    def _split_elements(self, data):
+        """ Returns the packed bits of each element, in array order, as a
+        numpy array of uint64. """
+        packed_bytes = (data & self._data_mask).to_bytes((self._size_in_bits + 7) // 8, "little")
+        bits = numpy.unpackbits(numpy.frombuffer(packed_bytes, dtype=numpy.uint8),
+                                count=self._size_in_bits, bitorder="little")
+        elements = bits.reshape(self._size, -1).astype(numpy.uint64).dot(self._numpy_bit_weights)
+        # The last element is in the least significant bits, so reverse.
+        return elements[::-1]
+
     def pack_data(self, data_to_pack, packed_data):
         for i in range(0, self._size):
             packed_data = self._subtype.pack_data(data_to_pack[i], packed_data)
         return packed_data
 
 
+@lru_cache(maxsize=None)
+def _pow2(exponent):
+    """ Returns exactly 2**exponent as a Decimal. Negative powers are not
+    computed as floats, which underflow to 0 below 2**-1074. """
+    if exponent >= 0:
+        return Decimal(1 << exponent)
+    # 2**-n is 5**n / 10**n, which needs as many digits as 5**n has
+    fives = 5 ** -exponent
+    return Decimal(fives).scaleb(exponent, Context(prec=len(str(fives))))
+
+
+def _delta_for(word_length, integer_word_length):
+    """ The delta of an FXP type, shared by every type with the same word
+    lengths since bitfiles tend to reuse a few FXP configurations. """
+    return _pow2(integer_word_length - word_length)
+
+
 class _FXP(_BaseType):
     """ Handles packing and unpacking FXP values from the FPGA. """
     def __init__(self, name, type_xml):
@@ -397,13 +529,15 @@ class _FXP(_BaseType):
         # Delta, min, and max exist in the XML, but are incorrect...
         # So we calculate them here instead.
         self._delta = self._calculate_delta()
+        self._decimal_context = self._calculate_decimal_context()
         self._minimum = self._calculate_minimum()
         self._maximum = self._calculate_maximum()
         self._size_in_bits = self._calculate_size_in_bits()
         self._data_mask = (1 << self._size_in_bits) - 1
         self._word_length_mask = (1 << self._word_length) - 1
-        if self._signed:
-            self._signed_bit_mask = 1 << (self._word_length - 1)
+        # 0 for unsigned types, so sign extending them is a no-op
+        self._signed_bit_mask = 1 << (self._word_length - 1) if self._signed else 0
+        self._integer_shift = self._calculate_integer_shift()
 
     @property
     def datatype(self):
@@ -424,7 +558,25 @@ class _FXP(_BaseType):
         The value persisted in the bitfile for delta is not always correct,
         therefore we must calculate it manually.
         """
-        return Decimal(2**(self._integer_word_length - self._word_length))
+        return _delta_for(self._word_length, self._integer_word_length)
+
+    def _calculate_decimal_context(self):
+        """ Creates the decimal context all of this type's Decimal arithmetic
+        is done in, so that it is exact no matter what precision the caller's
+        context has. A value is an integer of up to word length bits times
+        delta, so the precision needs room for the digits of both.
+        """
+        integer_digits = len(str(1 << self._word_length))
+        delta_digits = len(self._delta.as_tuple().digits)
+        return Context(prec=integer_digits + delta_digits)
+
+    def _calculate_integer_shift(self):
+        """ When there are no fractional bits, delta is 2**shift and values
+        can be scaled with an integer shift instead of a Decimal multiply.
+        Returns None for types with fractional bits.
+        """
+        shift = self._integer_word_length - self._word_length
+        return shift if shift >= 0 else None
 
     def _calculate_minimum(self):
         """ Determines the minimum possible value that can be represented with
@@ -434,7 +586,7 @@ class _FXP(_BaseType):
         """
         if self._signed:
             magnitude_bits = self._word_length - 1
-            return -1 * (2**(magnitude_bits) * self._delta)
+            return self._decimal_context.multiply(-2**(magnitude_bits), self._delta)
         else:
             return 0
 
@@ -448,7 +600,7 @@ class _FXP(_BaseType):
             magnitude_bits = self._word_length - 1
         else:
             magnitude_bits = self._word_length
-        return (2**(magnitude_bits) - 1) * self._delta
+        return self._decimal_context.multiply(2**(magnitude_bits) - 1, self._delta)
 
     def _calculate_size_in_bits(self):
         """ Fixed point values are transfered to the driver as an array of U32
@@ -466,28 +618,64 @@ class _FXP(_BaseType):
         decimal value or a tuple with the overflow status and the decimal
         value.
         """
+        if self._overflow_enabled:
+            (overflow, raw_value) = self.unpack_data_raw(data)
+            return (overflow, self._raw_value_to_decimal(raw_value))
+        return self._raw_value_to_decimal(self.unpack_data_raw(data))
+
+    def _raw_value_to_decimal(self, raw_value):
+        """ Scales a signed count of deltas to its Decimal value. """
+        if self._integer_shift is not None:
+            return Decimal(raw_value << self._integer_shift)
+        return self._decimal_context.multiply(raw_value, self._delta)
+
+    def unpack_data_raw(self, data):
+        """ Like unpack_data, but returns the value as a signed integer count
+        of deltas instead of a Decimal, e.g. 3 for 0.75 when delta is 0.25.
+        Useful for callers that do their own fixed point arithmetic and do
+        not need a Decimal for every value.
+        """
         data = data & self._data_mask
-        overflow = None
         if self._overflow_enabled:
             overflow = self._get_overflow_value(data)
-            data = self._remove_overflow_bit(data)
-
+            return (overflow, self._integer_twos_comp(self._remove_overflow_bit(data)))
+        return self._integer_twos_comp(data)
+
+    def unpack_many(self, data):
+        """ Like unpack_data for every element of a numpy array of uint64,
+        returned as a list. The masking, overflow bit and sign extension are
+        done on the whole array at once, leaving only the Decimal
+        multiplication per element.
+        """
+        word_length = self._word_length
+        values = data
+        if word_length < 64:
+            values = data & numpy.uint64(self._word_length_mask)
         if self._signed:
-            data = self._integer_twos_comp(data)
-        decimal_value = data * self._delta
-        if self._overflow_enabled:
-            return (overflow, decimal_value)
+            # Move the sign bit to the top, then shift back arithmetically.
+            unused_bits = 64 - word_length
+            values = (values << numpy.uint64(unused_bits)).view(numpy.int64) >> numpy.int64(unused_bits)
+        shift = self._integer_shift
+        if shift is not None:
+            decimal_values = [Decimal(value << shift) for value in values.tolist()]
         else:
-            return decimal_value
+            multiply = self._decimal_context.multiply
+            delta = self._delta
+            decimal_values = [multiply(value, delta) for value in values.tolist()]
+        if not self._overflow_enabled:
+            return decimal_values
+        if word_length < 64:
+            overflows = ((data >> numpy.uint64(word_length)) & numpy.uint64(1)).astype(bool).tolist()
+        else:
+            # the overflow bit doesn't fit in a uint64
+            overflows = [False] * len(decimal_values)
+        return list(zip(overflows, decimal_values))
 
     def _get_overflow_value(self, data):
         """ Mask out all the data within the word length, leaving the overflow
         bit. If the result after masking the the word portion of the fixed
         point is nonzero that indicates the data read has overflowed. """
-        mask = 2**(self._word_length)
-        if data & mask > 0:
-            return True
-        return False
+        return (data >> self._word_length) & 1 == 1
 
     def _remove_overflow_bit(self, data):
         """ This helper method masks out all bits not inside the word length,
@@ -495,13 +683,11 @@ class _FXP(_BaseType):
         return data & self._word_length_mask
 
     def _integer_twos_comp(self, data):
-        """ Checks the signed bit and determines if the value is negative, If
-        so take the twos complement of the input."""
-        if data & self._signed_bit_mask > 0:
-            data = data ^ self._word_length_mask
-            data += 1
-            data *= -1
-        return data
+        """ Interprets the word length bits of data as a twos complement value.
+        If the signed bit is set this subtracts 2**word_length, without
+        branching on it; for unsigned types the mask is 0 and data is
+        returned as is."""
+        return data - ((data & self._signed_bit_mask) << 1)
 
     def pack_data(self, data_to_pack, packed_data):
         (overflow, data) = self._validate_and_parse_user_input(data_to_pack)
@@ -517,10 +703,11 @@ class _FXP(_BaseType):
             fxp_representation = self._convert_value_to_fxp(data)
 
         if self._signed and data < 0:
-            fxp_representation = self._integer_twos_comp(fxp_representation)
+            # the twos complement of a negative value is its low word length bits
+            fxp_representation &= self._word_length_mask
 
         if overflow:
-            fxp_representation += 2**(self._word_length)
+            fxp_representation |= 1 << self._word_length
 
         packed_data <<= self._size_in_bits
         packed_data |= fxp_representation
@@ -544,7 +731,15 @@ class _FXP(_BaseType):
         return (overflow, data)
 
     def _convert_value_to_fxp(self, data):
-        calculated_fxp = Decimal(data) / Decimal(self._delta)
+        data = Decimal(data)
+        context = self._decimal_context
+        exponent = data.as_tuple().exponent
+        if isinstance(exponent, int) and exponent < 0:
+            # The input's digits after the decimal point need room too, or
+            # the check below can't tell whether the input was coerced.
+            context = context.copy()
+            context.prec -= exponent
+        calculated_fxp = context.divide(data, self._delta)
         fxp_representation = int(calculated_fxp)
         """ If the result of the division is not an integer, we lost some of
         the input data. In this case we warn the user that we had to coerce the
@@ -17,12 +17,19 @@ from builtins import bytes
 from math import ceil
 from future.utils import iteritems
 import locale
+import struct
 try:
     # Python 2
     xrange
 except NameError:
     # Python 3
     xrange = range
+try:
+    import numpy
+except ImportError:
+    # numpy is optional. It is required for the array based FIFO APIs and
+    # speeds up some FIFO data conversions when available.
+    numpy = None
 
 
 class Session(object):
@@ -560,8 +567,12 @@ class _FIFO(object):
         self._acquire_read_func = nifpga["AcquireFifoReadElements%s" % self._datatype]
         self._acquire_write_func = nifpga["AcquireFifoWriteElements%s" % self._datatype]
         self._release_elements_func = nifpga["ReleaseFifoElements"]
+        self._acquire_read_region_func = nifpga["AcquireFifoReadRegion"]
+        self._acquire_write_region_func = nifpga["AcquireFifoWriteRegion"]
         self._nifpga = nifpga
         self._ctype_type = self._datatype._return_ctype()
+        self._numpy_dtype = None if numpy is None else numpy.dtype(self._ctype_type)
+        self._signed = self._datatype.isSigned()
         self._name = bitfile_fifo.name
         self._type = bitfile_fifo.type
 
@@ -670,6 +681,71 @@ class _FIFO(object):
         return self.ReadValues(data=data,
                                elements_remaining=elements_remaining.value)
 
+    def _validate_numpy_array(self, array, writeable=False):
+        # The array's memory is handed straight to the driver, so these are
+        # raised rather than asserted to keep them under python -O.
+        if numpy is None:
+            raise TypeError("numpy is required to use the array FIFO APIs")
+        if array.dtype != self._numpy_dtype:
+            raise TypeError("Bad array dtype %s for FIFO '%s', expected %s"
+                            % (array.dtype, self._name, self._numpy_dtype))
+        if not array.flags['C_CONTIGUOUS']:
+            raise ValueError("Array for FIFO '%s' must be C contiguous" % self._name)
+        # the driver writes straight into the array's memory when reading
+        if writeable and not array.flags['WRITEABLE']:
+            raise ValueError("Array for FIFO '%s' must be writeable" % self._name)
+
+    def write_array(self, array, timeout_ms=0):
+        """ Writes a numpy array to the FIFO without converting each element.
+
+        The array's memory is handed directly to the driver, so this is much
+        faster than :meth:`_FIFO.write()` for large amounts of data.  FXP FIFOs
+        take an array of packed numpy.uint64 values.
+
+        Args:
+            array (numpy.ndarray): C contiguous array whose dtype matches the
+                                   FIFO's element type.
+            timeout_ms (int): The timeout to wait in milliseconds.
+
+        Returns:
+            elements_remaining (int): The number of elements remaining in the
+            host memory part of the DMA FIFO.
+        """
+        self._validate_numpy_array(array)
+        empty_elements_remaining = ctypes.c_size_t()
+        self._write_func(self._session,
+                         self._number,
+                         array.ctypes.data_as(ctypes.POINTER(self._ctype_type)),
+                         array.size,
+                         timeout_ms,
+                         empty_elements_remaining)
+        return empty_elements_remaining.value
+
+    def read_array(self, array, timeout_ms=0):
+        """ Reads from the FIFO directly into a preallocated numpy array.
+
+        Reads as many elements as the array holds.  No Python objects are
+        created per element, and the array can be reused across reads.
+
+        Args:
+            array (numpy.ndarray): C contiguous array whose dtype matches the
+                                   FIFO's element type.
+            timeout_ms (int): The timeout to wait in milliseconds.
+
+        Returns:
+            elements_remaining (int): The amount of elements remaining in the
+            FIFO.
+        """
+        self._validate_numpy_array(array, writeable=True)
+        elements_remaining = ctypes.c_size_t()
+        self._read_func(self._session,
+                        self._number,
+                        array.ctypes.data_as(ctypes.POINTER(self._ctype_type)),
+                        array.size,
+                        timeout_ms,
+                        elements_remaining)
+        return elements_remaining.value
+
     AcquireWriteValues = namedtuple("AcquireWriteValues",
                                     ["data", "elements_acquired",
                                      "elements_remaining"])
@@ -751,6 +827,35 @@ class _FIFO(object):
                                      ["region", "elements_acquired",
                                       "elements_remaining"])
 
+    def _acquire_region(self, acquire_func, number_of_elements, timeout_ms):
+        buf = ctypes.c_void_p()
+        buf_ptr = ctypes.pointer(buf)
+        region = ctypes.c_void_p()
+        region_ptr = ctypes.pointer(region)
+        elements_acquired = ctypes.c_size_t()
+        elements_remaining = ctypes.c_size_t()
+        acquire_func(self._session,
+                     self._number,
+                     region_ptr,
+                     buf_ptr,
+                     self._signed,
+                     self._transfer_size_bytes,
+                     number_of_elements,
+                     timeout_ms,
+                     elements_acquired,
+                     elements_remaining)
+        # View the acquired memory in place, indexing a memoryview is cheaper
+        # than indexing a ctypes pointer.
+        raw_type = ctypes.c_ubyte * (self._transfer_size_bytes * elements_acquired.value)
+        raw_buffer = raw_type.from_address(buf.value or 0)
+        buffer_view = memoryview(raw_buffer).cast('B').cast(_datatypes_to_format_chars[self._datatype])
+        region = ctypes.cast(region_ptr[0], ctypes.c_void_p)
+        accessor = _FIFODataAccessor(buffer_view, self._type, self._transfer_size_bytes, elements_acquired.value)
+        fifo_region = _FIFODataRegion(accessor, region, self)
+        return self.AcquireRegionValues(region=fifo_region,
+                                        elements_acquired=elements_acquired.value,
+                                        elements_remaining=elements_remaining.value)
+
     def acquire_read_region(self, number_of_elements, timeout_ms=0):
         """ Acquire regions of the FIFO's buffer directly.
 
@@ -772,30 +877,8 @@ class _FIFO(object):
                 AcquireRegionValues.elements_remaining (int): The amount of
                     elements remaining in the FIFO.
         """
-        buf = ctypes.c_void_p()
-        buf_ptr = ctypes.pointer(buf)
-        region = ctypes.c_void_p()
-        region_ptr = ctypes.pointer(region)
-        elements_acquired = ctypes.c_size_t()
-        elements_remaining = ctypes.c_size_t()
-        signed = self._datatype.isSigned()
-        self._nifpga["AcquireFifoReadRegion"](self._session,
-                                              self._number,
-                                              region_ptr,
-                                              buf_ptr,
-                                              signed,
-                                              self._transfer_size_bytes,
-                                              number_of_elements,
-                                              timeout_ms,
-                                              elements_acquired,
-                                              elements_remaining)
-        casted_buffer = ctypes.cast(buf_ptr[0], ctypes.POINTER(self._ctype_type))
-        region = ctypes.cast(region_ptr[0], ctypes.c_void_p)
-        accessor = _FIFODataAccessor(casted_buffer, self._type, self._transfer_size_bytes, elements_acquired.value)
-        fifo_region = _FIFODataRegion(accessor, region, self)
-        return self.AcquireRegionValues(region=fifo_region,
-                                        elements_acquired=elements_acquired.value,
-                                        elements_remaining=elements_remaining.value)
+        return self._acquire_region(self._acquire_read_region_func,
+                                    number_of_elements, timeout_ms)
 
     def acquire_write_region(self, number_of_elements, timeout_ms=0):
         """ Acquire regions of the FIFO's buffer directly.
@@ -818,30 +901,8 @@ class _FIFO(object):
                 AcquireRegionValues.elements_remaining (int): The amount of
                     elements remaining in the FIFO.
         """
-        buf = ctypes.c_void_p()
-        buf_ptr = ctypes.pointer(buf)
-        region = ctypes.c_void_p()
-        region_ptr = ctypes.pointer(region)
-        elements_acquired = ctypes.c_size_t()
-        elements_remaining = ctypes.c_size_t()
-        signed = self._datatype.isSigned()
-        self._nifpga["AcquireFifoWriteRegion"](self._session,
-                                               self._number,
-                                               region_ptr,
-                                               buf_ptr,
-                                               signed,
-                                               self._transfer_size_bytes,
-                                               number_of_elements,
-                                               timeout_ms,
-                                               elements_acquired,
-                                               elements_remaining)
-        casted_buffer = ctypes.cast(buf_ptr[0], ctypes.POINTER(self._ctype_type))
-        region = ctypes.cast(region_ptr[0], ctypes.c_void_p)
-        accessor = _FIFODataAccessor(casted_buffer, self._type, self._transfer_size_bytes, elements_acquired.value)
-        fifo_region = _FIFODataRegion(accessor, region, self)
-        return self.AcquireRegionValues(region=fifo_region,
-                                        elements_acquired=elements_acquired.value,
-                                        elements_remaining=elements_remaining.value)
+        return self._acquire_region(self._acquire_write_region_func,
+                                    number_of_elements, timeout_ms)
 
     def release_region(self, accessor):
         """ Releases a region.
@@ -1078,19 +1139,12 @@ def _combine_array_of_u8_into_one_value(data, element_index, transfer_size_bytes
     be the data bits. The 10 LSB of the combinedData must be shifted
     off in order to not mess up further calculations.
     """
-    combinedData = 0
     if transfer_size_bytes >= 4:
-        index = element_index
-        element_end = element_index + transfer_size_bytes
-        while index < element_end:
-            combinedData = (combinedData << 8) + data[index + 3]
-            combinedData = (combinedData << 8) + data[index + 2]
-            combinedData = (combinedData << 8) + data[index + 1]
-            combinedData = (combinedData << 8) + data[index]
-            index += 4
+        combinedData = 0
+        for word in struct.unpack_from("<%dI" % (transfer_size_bytes // 4), data, element_index):
+            combinedData = (combinedData << 32) | word
     elif transfer_size_bytes == 2:
-        combinedData = data[element_index + 1]
-        combinedData = (combinedData << 8) + data[element_index]
+        combinedData = struct.unpack_from("<H", data, element_index)[0]
     else:
         combinedData = data[element_index]
     if transfer_size_bytes > 4:
@@ -1108,22 +1162,14 @@ def _convert_to_u8_array(u8_array, element_index, data, transfer_size_bytes, siz
     if transfer_size_bytes == 1:
         u8_array[element_index] = data & 0xFF
     elif transfer_size_bytes == 2:
-        u8_array[element_index] = data & 0xFF
-        data = data >> 8
-        u8_array[element_index + 1] = data & 0xFF
+        struct.pack_into("<H", u8_array, element_index, data & 0xFFFF)
     else:  # >= 4
         # Insert the data such that the Most Significant Words are at the lower
         # indexes while each word's endianness is swapped
-        for index in reversed(range(0, transfer_size_bytes, 4)):
-            local_index = element_index + index
-            u8_array[local_index] = data & 0xFF
-            data = data >> 8
-            u8_array[local_index + 1] = data & 0xFF
-            data = data >> 8
-            u8_array[local_index + 2] = data & 0xFF
-            data = data >> 8
-            u8_array[local_index + 3] = data & 0xFF
-            data = data >> 8
+        word_count = transfer_size_bytes // 4
+        words = [(data >> (32 * shift)) & 0xFFFFFFFF
+                 for shift in reversed(range(word_count))]
+        struct.pack_into("<%dI" % word_count, u8_array, element_index, *words)
 
 
 class _DataConvertingFifo(_FIFO):
@@ -1187,6 +1233,62 @@ class _DataConvertingFifo(_FIFO):
         return self.ReadValues(data=data,
                                elements_remaining=elements_remaining.value)
 
+    def _validate_numpy_array(self, array, writeable=False):
+        super(_DataConvertingFifo, self)._validate_numpy_array(array, writeable)
+        if array.size % self._transfer_size_bytes != 0:
+            raise ValueError("Array for FIFO '%s' must hold a whole number of %d byte elements"
+                             % (self._name, self._transfer_size_bytes))
+
+    def write_array(self, array, timeout_ms=0):
+        """ Writes already packed elements from a numpy.uint8 array.
+
+        The array holds transfer_size_bytes bytes per element, in the same
+        layout the FPGA expects.
+        """
+        self._validate_numpy_array(array)
+        empty_elements_remaining = ctypes.c_size_t()
+        self._write_func(self._session,
+                         self._number,
+                         array.ctypes.data_as(ctypes.POINTER(self._ctype_type)),
+                         self._transfer_size_bytes,
+                         array.size // self._transfer_size_bytes,
+                         timeout_ms,
+                         empty_elements_remaining)
+        return empty_elements_remaining.value
+
+    def read_array(self, array, timeout_ms=0):
+        """ Reads packed elements into a preallocated numpy.uint8 array.
+
+        The array holds transfer_size_bytes bytes per element, in the same
+        layout the FPGA sends.
+        """
+        self._validate_numpy_array(array, writeable=True)
+        elements_remaining = ctypes.c_size_t()
+        self._read_func(self._session,
+                        self._number,
+                        array.ctypes.data_as(ctypes.POINTER(self._ctype_type)),
+                        self._transfer_size_bytes,
+                        array.size // self._transfer_size_bytes,
+                        timeout_ms,
+                        elements_remaining)
+        return elements_remaining.value
+
+
+# memoryview format characters for the element types FIFO regions are viewed as
+_datatypes_to_format_chars = {
+    DataType.Bool: 'B',
+    DataType.I8: 'b',
+    DataType.U8: 'B',
+    DataType.I16: 'h',
+    DataType.U16: 'H',
+    DataType.I32: 'i',
+    DataType.U32: 'I',
+    DataType.I64: 'q',
+    DataType.U64: 'Q',
+    DataType.Sgl: 'f',
+    DataType.Dbl: 'd',
+}
+
 
 class _FIFODataAccessor(object):
     """
@@ -1205,11 +1307,23 @@ class _FIFODataAccessor(object):
                 packed_data = _combine_array_of_u8_into_one_value(self._buffer, element_index, self._bytes_per_element, self._type.size_in_bits)
                 yield self._type.unpack_data(packed_data)
         elif self._type.datatype is DataType.Fxp:
-            for index in xrange(self._number_of_elements):
-                yield self._type.unpack_data(self._buffer[index])
+            if numpy is not None:
+                # FXP FIFO elements are uint64, so convert them all at once
+                as_array = numpy.frombuffer(self._buffer, dtype=numpy.uint64, count=self._number_of_elements)
+                for value in self._type.unpack_many(as_array):
+                    yield value
+            else:
+                for index in xrange(self._number_of_elements):
+                    yield self._type.unpack_data(self._buffer[index])
         elif self._type.datatype is DataType.Bool:
-            for index in xrange(self._number_of_elements):
-                yield bool(self._buffer[index])
+            if numpy is not None:
+                # convert the whole buffer in one pass instead of element by element
+                as_array = numpy.frombuffer(self._buffer, dtype=numpy.uint8, count=self._number_of_elements)
+                for value in (as_array != 0).tolist():
+                    yield value
+            else:
+                for index in xrange(self._number_of_elements):
+                    yield bool(self._buffer[index])
         else:
             for index in xrange(self._number_of_elements):
                 yield self._buffer[index]
@@ -1236,9 +1350,16 @@ class _FIFODataAccessor(object):
             packed_element = self._type.pack_data(value, 0)
             _convert_to_u8_array(self._buffer, element_index, packed_element, self._bytes_per_element, self._type.size_in_bits)
         elif self._type.datatype is DataType.Fxp:
-            self._buffer[index] = self._type.pack_data(value, 0)
+            # FXP FIFO elements are uint64, which the overflow bit of a 64 bit
+            # word doesn't fit in, so it is dropped as write() does.
+            self._buffer[index] = self._type.pack_data(value, 0) & 0xffffffffffffffff
         else:
-            self._buffer[index] = value
+            try:
+                self._buffer[index] = value
+            except ValueError:
+                # A memoryview rejects values out of the element's range,
+                # wrap them around like the ctypes buffers write() uses.
+                self._buffer[index] = self._type.datatype._return_ctype()(value).value
 
     def __len__(self):
         return self._number_of_elements
@@ -39,6 +39,10 @@ Copyright (c) 2017 National Instruments
 """
 import functools
 import warnings
+from numbers import Integral as _Integral
+from types import MappingProxyType as _MappingProxyType
+
+_warn = warnings.warn
 
 
 def _raise_or_warn_if_nonzero_status(status, function_name, argument_names, *args):
@@ -61,17 +65,17 @@ def _raise_or_warn_if_nonzero_status(status, function_name, argument_names, *arg
     if status == 0:
         return
 
-    if status in codes_to_exception_classes:
-        if status < 0:
-            raise codes_to_exception_classes[status](function_name, argument_names, *args)
-        else:
-            warning = codes_to_exception_classes[status](function_name, argument_names, *args)
-            warnings.warn(warning)
-    else:
-        if status < 0:
+    if status < 0:
+        error_class = _lookup_error_class(status)
+        if error_class is None:
             raise UnknownError(status, function_name, argument_names, *args)
-        else:
-            warnings.warn(UnknownWarning(status, function_name, argument_names, *args))
+        raise error_class(function_name, argument_names, *args)
+
+    warning_class = _lookup_warning_class(status)
+    if warning_class is None:
+        _warn(UnknownWarning(status, function_name, argument_names, *args))
+    else:
+        _warn(warning_class(function_name, argument_names, *args))
 
 
 def check_status(function_name, argument_names):
@@ -90,18 +94,68 @@ def check_status(function_name, argument_names):
         arguments after catching an exception if the function fails
         (e.g. 'e.get_args()["session"]').
     """
+    # every Status raised by the wrapped function shares this, so freeze it
+    argument_names = tuple(argument_names)
+
     def decorator(function):
-        @functools.wraps(function)
-        def internal(*args):
-            if hasattr(function, "argtypes") and len(args) != len(function.argtypes):
-                raise TypeError("%s takes exactly %u arguments (%u given)"
-                                % (function_name, len(function.argtypes), len(args)))
-            status = function(*args)
-            _raise_or_warn_if_nonzero_status(status, function_name, argument_names, args)
+        if not hasattr(function, "argtypes"):
+            @functools.wraps(function)
+            def internal(*args):
+                status = function(*args)
+                if status:
+                    _raise_or_warn_if_nonzero_status(status, function_name, argument_names, args)
+            return internal
+
+        argument_count = len(function.argtypes)
+        assert len(argument_names) == argument_count, \
+            "%s has %u argument names but %u argtypes" \
+            % (function_name, len(argument_names), argument_count)
+        make_internal = _get_status_checked_factory(argument_count)
+        internal = make_internal(function, function_name, argument_names)
+        functools.update_wrapper(internal, function)
+        # so arity errors raised by python name the function being called
+        internal.__qualname__ = function_name
         return internal
     return decorator
 
 
+# factories for wrappers with an exact positional signature, keyed by arity
+_status_checked_factories = {}
+
+_status_checked_factory_template = """
+def make_internal(function, function_name, argument_names):
+    def internal(%(params)s):
+        status = function(%(params)s)
+        if status:
+            _raise_or_warn_if_nonzero_status(status, function_name, argument_names, (%(args_tuple)s))
+    return internal
+"""
+
+
+def _get_status_checked_factory(argument_count):
+    """
+    Returns a function that wraps a ctypes function taking exactly
+    'argument_count' arguments.
+
+    The generated wrapper takes its arguments positionally instead of as
+    '*args', so calling it doesn't pack and unpack an argument tuple, and
+    python itself rejects calls with the wrong number of arguments (ctypes
+    only rejects too few). The code is compiled once per arity.
+    """
+    factory = _status_checked_factories.get(argument_count)
+    if factory is None:
+        params = ["arg%u" % i for i in range(argument_count)]
+        source = _status_checked_factory_template % {
+            "params": ", ".join(params),
+            "args_tuple": "".join(param + ", " for param in params),
+        }
+        namespace = {"_raise_or_warn_if_nonzero_status": _raise_or_warn_if_nonzero_status}
+        exec(compile(source, "<check_status arity %u>" % argument_count, "exec"), namespace)
+        factory = namespace["make_internal"]
+        _status_checked_factories[argument_count] = factory
+    return factory
+
+
 class Status(BaseException):
     def __init__(self, code, code_string, function_name, argument_names,
                  function_args):
@@ -122,20 +176,29 @@ class Status(BaseException):
         self._code = code
         self._code_string = code_string
         self._function_name = function_name
-
-        self._named_args = []
-        for i, arg in enumerate(function_args):
-            self._named_args.append(
-                {
-                    "name": argument_names[i],
-                    "value": arg
-                })
+        # names are paired up with their values only when they're needed
+        self._argument_names = argument_names
+        self._function_args = function_args
         # this is also necessary to properly reconstruct the object when
         # passing it between processes
         super(Status, self).__init__(self._code,
                                      self._code_string,
                                      self._function_name,
-                                     self._named_args)
+                                     self._argument_names,
+                                     self._function_args)
+
+    def __reduce__(self):
+        """
+        Pickles the arguments Status.__init__ needs. Generated subclasses
+        take fewer constructor arguments than 'args' holds, so the default
+        BaseException pickling can't recreate them.
+        """
+        return (_unpickle_status, (type(self),
+                                   self._code,
+                                   self._code_string,
+                                   self._function_name,
+                                   self._argument_names,
+                                   self._function_args))
 
     def get_code(self):
         return self._code
@@ -167,10 +230,9 @@ class Status(BaseException):
 
         """
         arg_dict = {}
-        for arg in self._named_args:
+        for name, arg in zip(self._argument_names, self._function_args):
             # ctypes types all have a member named 'value'.
-            value = arg["value"].value if hasattr(arg["value"], "value") else arg["value"]
-            arg_dict[arg["name"]] = value
+            arg_dict[name] = arg.value if hasattr(arg, "value") else arg
         return arg_dict
 
     def _stringify_arg(self, arg):
@@ -182,17 +244,16 @@ class Status(BaseException):
         Stringify numbers as hex to make it easier to decode
         bit packed sessions, attributes, etc.
         """
-        # ctypes types all have a member named 'value'.
-        if hasattr(arg, "value"):
-            return self._stringify_arg(arg.value)
+        # ctypes types all have a '_type_' and simple ctypes types have a
+        # member named 'value'. Unwrap it once, the value is a python object.
+        if hasattr(arg, "_type_") and hasattr(arg, "value"):
+            arg = arg.value
 
         if isinstance(arg, str):
             return "'%s'" % arg
-
-        try:
+        if isinstance(arg, _Integral):
             return hex(arg)
-        except TypeError:
-            return str(arg)
+        return str(arg)
 
     def __str__(self):
         """
@@ -211,9 +272,8 @@ class Status(BaseException):
                 elements remaining: 0x300L
                 a bogus string argument: 'I am a string'
         """
-        arg_string = ""
-        for arg in self._named_args:
-            arg_string += "\n\t%s: %s" % (arg["name"], self._stringify_arg(arg["value"]))
+        arg_string = "".join("\n\t%s: %s" % (name, self._stringify_arg(arg))
+                             for name, arg in zip(self._argument_names, self._function_args))
         return "%s: %s (%d) when calling '%s' with arguments:%s" \
             % ("Error" if self._code < 0 else "Warning",
                self._code_string,
@@ -222,6 +282,15 @@ class Status(BaseException):
                arg_string)
 
 
+def _unpickle_status(status_class, code, code_string, function_name,
+                     argument_names, function_args):
+    """ Recreates a pickled Status, see Status.__reduce__. """
+    status = status_class.__new__(status_class)
+    Status.__init__(status, code, code_string, function_name, argument_names,
+                    function_args)
+    return status
+
+
 class WarningStatus(Status, RuntimeWarning):
     """
     Base warning class for when an NiFpga function returns a warning (> 0)
@@ -266,6 +335,32 @@ class UnknownError(ErrorStatus):
                                            function_args=function_args)
 
 
+class _CodedWarningStatus(WarningStatus):
+    """
+    Base class for the generated warning classes. Subclasses only define the
+    CODE and CODE_STRING class attributes.
+    """
+    def __init__(self, function_name, argument_names, function_args):
+        super(_CodedWarningStatus, self).__init__(code=self.CODE,
+                                                  code_string=self.CODE_STRING,
+                                                  function_name=function_name,
+                                                  argument_names=argument_names,
+                                                  function_args=function_args)
+
+
+class _CodedErrorStatus(ErrorStatus):
+    """
+    Base class for the generated error classes. Subclasses only define the
+    CODE and CODE_STRING class attributes.
+    """
+    def __init__(self, function_name, argument_names, function_args):
+        super(_CodedErrorStatus, self).__init__(code=self.CODE,
+                                                code_string=self.CODE_STRING,
+                                                function_name=function_name,
+                                                argument_names=argument_names,
+                                                function_args=function_args)
+
+
 # Define error codes and their names.
 # Each code in this list will be codegened into two classes, e.g.:
 #   FifoTimeoutError (for code -50400)
@@ -349,42 +444,28 @@ error_codes = [
     (-63198, "OutOfHandles"),
 ]
 
-# create an exception class for each error code and add to dictionary
+# create an exception class for each error code and add to the dictionaries
 # ie FifoTimeoutWarning, FifoTimeoutError
-codes_to_exception_classes = {}
+_error_classes = {}
+_warning_classes = {}
+_lookup_error_class = _error_classes.get
+_lookup_warning_class = _warning_classes.get
 _g = globals()
 for code, code_string in error_codes:
-    # we need introduce a scope, otherwise code, and code_string
-    # will all reference the same value.
-    def add_classes(code, code_string):
-        classname = code_string + 'Error'
-
-        def __init__(self, function_name, argument_names, function_args):
-            ErrorStatus.__init__(self,
-                                 code=code,
-                                 code_string=code_string,
-                                 function_name=function_name,
-                                 argument_names=argument_names,
-                                 function_args=function_args)
-        error_class = type(classname, (ErrorStatus,),
-                           {'__init__': __init__, 'CODE': code})
-        codes_to_exception_classes[code] = error_class
-        # copy the exception type into module globals
-        _g[error_class.__name__] = error_class
-
-        classname = code_string + 'Warning'
-
-        def __init__(self, function_name, argument_names, function_args):
-            WarningStatus.__init__(self,
-                                   code=-code,
-                                   code_string=code_string,
-                                   function_name=function_name,
-                                   argument_names=argument_names,
-                                   function_args=function_args)
-        warning_class = type(classname, (WarningStatus,),
-                             {'__init__': __init__, 'CODE': -code})
-        codes_to_exception_classes[-code] = warning_class
-        # copy the warning type into module globals
-        _g[warning_class.__name__] = warning_class
-
-    add_classes(code, code_string)
+    error_class = type(code_string + 'Error', (_CodedErrorStatus,),
+                       {'CODE': code, 'CODE_STRING': code_string})
+    _error_classes[code] = error_class
+    # copy the exception type into module globals
+    _g[error_class.__name__] = error_class
+
+    warning_class = type(code_string + 'Warning', (_CodedWarningStatus,),
+                         {'CODE': -code, 'CODE_STRING': code_string})
+    _warning_classes[-code] = warning_class
+    # copy the warning type into module globals
+    _g[warning_class.__name__] = warning_class
+del code, code_string, error_class, warning_class
+
+# read-only view of every code and its class
+_codes_to_exception_classes = dict(_error_classes)
+_codes_to_exception_classes.update(_warning_classes)
+codes_to_exception_classes = _MappingProxyType(_codes_to_exception_classes)
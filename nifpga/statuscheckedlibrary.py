@@ -1,11 +1,19 @@
 from .status import check_status, VersionMismatchError
 import ctypes
 import ctypes.util
+import threading
 
 StatusType = ctypes.c_int32
 
 
+def returnsVersionMismatchError(*args, **kwargs):
+    """ Always returns the version mismatch error code. """
+    return VersionMismatchError.CODE
+
+
 class FunctionInfo(object):
+    __slots__ = ('function', 'name', 'argument_names')
+
     def __init__(self, function, name, argument_names):
         """
         A struct describing a function to be used in StatusCheckedFunctions.
@@ -15,7 +23,7 @@ class FunctionInfo(object):
                 e.g. "ReadFifoU32".
                 See 'StatusCheckedFunctions' to see this parameter's usage
                 and how functions are called with this name.
-            argument_names (list): a list of the strings of the arguments to
+            argument_names (iterable): the strings of the arguments to
             'function'
                 e.g. ["session",
                         "fifo",
@@ -29,7 +37,7 @@ class FunctionInfo(object):
         """
         self.function = function
         self.name = name
-        self.argument_names = argument_names
+        self.argument_names = tuple(argument_names)
 
     def __str__(self):
         return ("FunctionInfo"
@@ -75,9 +83,6 @@ class StatusCheckedFunctions(object):
             # This raises FifoTimeoutWarning.
             checked_functions["MyFunc"](50400)
         """
-        # dictionary of function names to a closure that wraps a
-        # function with a status check
-        self._wrapped_functions = {}
         for function_info in function_infos:
             decorator = check_status(function_info.function.__name__,
                                      function_info.argument_names)
@@ -87,9 +92,6 @@ class StatusCheckedFunctions(object):
             # So now "<this object>.Open(...)" works
             setattr(self, function_info.name, closure)
 
-            # Store closure this so __getitem__ can provide more convenience
-            self._wrapped_functions[function_info.name] = closure
-
     def __getitem__(self, key):
         """
         Override bracket operator to call wrapped functions.
@@ -99,10 +101,13 @@ class StatusCheckedFunctions(object):
             datatype = "U64"
             <this object>['ReadArray%s' % datatype](session, ...)
         """
-        return self._wrapped_functions[key]
+        # the closures are stored as instance attributes by __init__
+        return self.__dict__[key]
 
 
 class NamedArgtype(object):
+    __slots__ = ('name', 'argtype')
+
     def __init__(self, name, argtype):
         """
         A struct of a name and ctypes argtype for a function argument
@@ -118,6 +123,8 @@ class NamedArgtype(object):
 
 
 class LibraryFunctionInfo(object):
+    __slots__ = ('pretty_name', 'name_in_library', 'named_argtypes')
+
     def __init__(self, pretty_name, name_in_library, named_argtypes):
         """
         A struct describing a library entry point function to be used
@@ -140,13 +147,38 @@ class LibraryNotFoundError(RuntimeError):
     pass
 
 
+# find_library() can be slow (it may run ldconfig or a compiler), so remember
+# where each library was found and reuse the already loaded library.
+_library_paths = {}
+_loaded_libraries = {}
+_library_lock = threading.Lock()
+
+
+def _load_library(library_name, library_path):
+    with _library_lock:
+        if library_path is None:
+            library_path = _library_paths.get(library_name)
+            if library_path is None:
+                library_path = ctypes.util.find_library(library_name)
+                if library_path is None:
+                    raise LibraryNotFoundError(library_name)
+                _library_paths[library_name] = library_path
+        library = _loaded_libraries.get(library_path)
+        if library is None:
+            library = ctypes.cdll.LoadLibrary(library_path)
+            _loaded_libraries[library_path] = library
+        return library
+
+
 class StatusCheckedLibrary(StatusCheckedFunctions):
-    def __init__(self, library_name, library_function_infos):
+    def __init__(self, library_name, library_function_infos, library_path=None):
         """
         Raises exceptions from entry points that return NiFpga_Status codes.
 
         library_name: e.g. "NiFpga" (libNiFpga.so, NiFpga.dll)
         library_function_infos: a list of library_function_info objects
+        library_path: optional path to the library, e.g. "/usr/lib/libNiFpga.so"
+            If given, the library isn't searched for by library_name.
 
         Automatically wraps each entry point named in library_function_infos
         with a closure that raises an appropriate derived class of
@@ -170,28 +202,28 @@ class StatusCheckedLibrary(StatusCheckedFunctions):
             cool_library.AwesomeFunction(7)
             cool_library["AwesomeFunction"](7)
         """
-        library = ctypes.util.find_library(library_name)
-        if library is None:
-            raise LibraryNotFoundError(library_name)
-        library = ctypes.cdll.LoadLibrary(library)
+        library = _load_library(library_name, library_path)
         function_infos = []
         for lfi in library_function_infos:
+            # The library is shared between instances.  Unlike getattr(),
+            # indexing doesn't cache the function on it, so each instance
+            # gets its own function to set argtypes and restype on.
             try:
-                func = getattr(library, lfi.name_in_library)  # i.e., dlsym()
+                func = library[lfi.name_in_library]  # i.e., dlsym()
+            except AttributeError:
+                func = None
+            if func is None:
+                # if we can't find the symbol, instead insert a function that
+                # always returns the VersionMismatch error, that way they can
+                # use the rest of the API
+                func = returnsVersionMismatchError
+            else:
                 # ctypes functions have special 'argtypes' and 'restype' fields
                 # that we set, so ctypes can automatically convert types and knows
                 # how to call into the library.
                 func.argtypes = [named_argtype.argtype for named_argtype in lfi.named_argtypes]
                 # Assume that everything returns an NiFpga_Status
                 func.restype = StatusType
-            except AttributeError:
-                # if we can't find the symbol, instead insert a function that
-                # always returns the VersionMismatch error, that way they can
-                # use the rest of the API
-                def returnsVersionMismatchError(*args, **kwargs):
-                    """ Always returns the version mismatch error code. """
-                    return VersionMismatchError.CODE
-                func = returnsVersionMismatchError
             function_infos.append(
                 FunctionInfo(function=func,
                              name=lfi.pretty_name,
@@ -0,0 +1,124 @@
+from nifpga.bitfile import _parse_type
+import nifpga.bitfile
+import mock
+import unittest
+import xml.etree.ElementTree as ElementTree
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+array_xml = """
+<Array>
+    <Name>%(name)s</Name>
+    <Size>3</Size>
+    <Type>
+        <%(type)s>
+            <Name/>
+        </%(type)s>
+    </Type>
+</Array>
+"""
+
+
+def _parse_array(type_name):
+    return _parse_type(ElementTree.fromstring(array_xml % {"name": "array " + type_name,
+                                                           "type": type_name}))
+
+
+class NumericArrayTests(unittest.TestCase):
+    def assert_unpacks_and_packs(self, register, packed, expected):
+        # bits above the array are left in by clusters and must be ignored
+        self.assertEqual(expected, register.unpack_data(packed | (0xff << register.size_in_bits)))
+        self.assertEqual(packed, register.pack_data(expected, 0))
+
+    def test_unsigned_array(self):
+        self.assert_unpacks_and_packs(_parse_array("U16"),
+                                      0x0001ffff8000,
+                                      [1, 65535, 32768])
+
+    def test_signed_array(self):
+        self.assert_unpacks_and_packs(_parse_array("I8"),
+                                      0x7f80ff,
+                                      [127, -128, -1])
+
+    def test_64bit_array(self):
+        self.assert_unpacks_and_packs(_parse_array("I64"),
+                                      (0xffffffffffffffff << 128) | (0x8000000000000000 << 64) | 5,
+                                      [-1, -2**63, 5])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_numpy_and_python_unpacking_agree(self):
+        register = _parse_array("I32")
+        self.assertIsNotNone(register._numpy_dtype)
+        packed = 0x80000000ffffffff00000001
+        with mock.patch.object(nifpga.bitfile, "numpy", None):
+            python_register = _parse_array("I32")
+        self.assertIsNone(python_register._numpy_dtype)
+        self.assertEqual(python_register.unpack_data(packed), register.unpack_data(packed))
+        self.assertEqual(type(register.unpack_data(packed)[0]), int)
+
+
+fxp_array_xml = """
+<Array>
+    <Name>fxp array</Name>
+    <Size>64</Size>
+    <Type>
+        <FXP>
+            <Name/>
+            <Signed>true</Signed>
+            <WordLength>20</WordLength>
+            <IntegerWordLength>8</IntegerWordLength>
+            <IncludeOverflowStatus>true</IncludeOverflowStatus>
+        </FXP>
+    </Type>
+</Array>
+"""
+
+bool_array_xml = """
+<Array>
+    <Name>bool array</Name>
+    <Size>64</Size>
+    <Type>
+        <Boolean>
+            <Name/>
+        </Boolean>
+    </Type>
+</Array>
+"""
+
+
+class LargeArrayTests(unittest.TestCase):
+    def assert_numpy_and_python_unpacking_agree(self, xml, packed):
+        register = _parse_type(ElementTree.fromstring(xml))
+        with mock.patch.object(nifpga.bitfile, "numpy", None):
+            python_register = _parse_type(ElementTree.fromstring(xml))
+        self.assertEqual(python_register.unpack_data(packed), register.unpack_data(packed))
+        self.assertEqual(packed, register.pack_data(register.unpack_data(packed), 0))
+        return register
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_fxp_array(self):
+        # element i holds i, with the overflow bit set on odd elements and
+        # the sign bit set on every third element
+        packed = 0
+        for i in range(64):
+            packed = (packed << 21) | ((i & 1) << 20) | ((i % 3 == 0) << 19) | i
+        register = self.assert_numpy_and_python_unpacking_agree(fxp_array_xml, packed)
+        self.assertIsNotNone(register._numpy_bit_weights)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_bool_array(self):
+        register = self.assert_numpy_and_python_unpacking_agree(bool_array_xml, 0xa5c3f00f17e81234)
+        self.assertEqual([True, False, True, False, False, True, False, True],
+                         register.unpack_data(0xa5c3f00f17e81234)[:8])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_numpy_without_unpackbits_bitorder_splits_elements_in_python(self):
+        register = _parse_type(ElementTree.fromstring(bool_array_xml))
+        with mock.patch.object(nifpga.bitfile, "_numpy_can_unpack_bits", False):
+            old_numpy_register = _parse_type(ElementTree.fromstring(bool_array_xml))
+        self.assertIsNone(old_numpy_register._numpy_bit_weights)
+        self.assertEqual(register.unpack_data(0xa5c3f00f17e81234),
+                         old_numpy_register.unpack_data(0xa5c3f00f17e81234))
@@ -1,6 +1,8 @@
 from nifpga.bitfile import (_parse_type,
                             UnsupportedTypeError,
                             ClusterMustContainUniqueNames)
+import pickle
+import types
 import unittest
 import xml.etree.ElementTree as ElementTree
 
@@ -139,91 +141,119 @@ cluster_with_multiple_members_with_the_same_name = """
 """
 
 
+def _frozen(value):
+    """ Makes the dicts in an expected value read only, since the tests share
+    them. Lists are left as they are, to compare equal to unpacked arrays. """
+    if isinstance(value, dict):
+        return types.MappingProxyType({key: _frozen(member) for key, member in value.items()})
+    if isinstance(value, list):
+        return [_frozen(member) for member in value]
+    return value
+
+
+expected_zero_data = _frozen(
+    {'Input Cluster U16': 0,
+     'output cluster 2': {'Input Cluster FXP 4-bit Signed': (False, 0),
+                          'Input Cluster  U8': 0,
+                          'Input Cluster U64': 0,
+                          'Input Cluster I8': 0},
+     'output cluster array': [{'Input Cluster FXP 64-bit Signed Overflow 2': (False, 0),
+                               'Input Cluster I16 2': 0,
+                               'Input Cluster FXP 32-bit Unsigned Overflow 2': (False, 0),
+                               'Input Cluster Bool 2': False},
+                              {'Input Cluster FXP 64-bit Signed Overflow 2': (False, 0),
+                               'Input Cluster I16 2': 0,
+                               'Input Cluster FXP 32-bit Unsigned Overflow 2': (False, 0),
+                               'Input Cluster Bool 2': False}],
+     'Input Cluster I32': 0,
+     'Input Cluster EnumU8': 0,
+     'Input Cluster U32': 0,
+     'output fxp array': [0, 0]})
+
+packed_values_set_to_1_data = 0x90040000000000000004040000000200000000000200010000800000004000000000004000200010000000100010000000101000100
+expected_values_set_to_1_data = _frozen(
+    {'Input Cluster U16': 1,
+     'output cluster 2': {'Input Cluster FXP 4-bit Signed': (False, 1),
+                          'Input Cluster  U8': 1,
+                          'Input Cluster U64': 1,
+                          'Input Cluster I8': 1},
+     'output cluster array': [{'Input Cluster FXP 64-bit Signed Overflow 2': (False, 1),
+                               'Input Cluster I16 2': 1,
+                               'Input Cluster FXP 32-bit Unsigned Overflow 2': (False, 1),
+                               'Input Cluster Bool 2': True},
+                              {'Input Cluster FXP 64-bit Signed Overflow 2': (False, 1),
+                               'Input Cluster I16 2': 1,
+                               'Input Cluster FXP 32-bit Unsigned Overflow 2': (False, 1),
+                               'Input Cluster Bool 2': True}],
+     'Input Cluster I32': 1,
+     'Input Cluster EnumU8': 1,
+     'Input Cluster U32': 1,
+     'output fxp array': [1, 1]})
+
+packed_random_data = 0xf01c0040ddca1b2894bb81ffffa93200000001ffff0011800040030b46c00000000000007d18001001d4baf0000ffffffff0000ff00
+expected_random_data = _frozen(
+    {'Input Cluster U16': 1,
+     'output cluster 2': {'Input Cluster FXP 4-bit Signed': (True, -1),
+                          'Input Cluster  U8': 7,
+                          'Input Cluster U64': 4564564654564654,
+                          'Input Cluster I8': -32},
+     'output cluster array': [{'Input Cluster FXP 64-bit Signed Overflow 2': (False, -11111),
+                               'Input Cluster I16 2': -1,
+                               'Input Cluster FXP 32-bit Unsigned Overflow 2': (True, 17.5),
+                               'Input Cluster Bool 2': False},
+                              {'Input Cluster FXP 64-bit Signed Overflow 2': (True, 797979),
+                               'Input Cluster I16 2': 0,
+                               'Input Cluster FXP 32-bit Unsigned Overflow 2': (False, 1000.75),
+                               'Input Cluster Bool 2': True}],
+     'Input Cluster I32': 1919919,
+     'Input Cluster EnumU8': 0,
+     'Input Cluster U32': 4294967295,
+     'output fxp array': [0, -1]})
+
+
+def setUpModule():
+    # The XML never changes, so parse each document once for the whole module.
+    global cluster_tree, cluster_with_cfxp_tree, \
+        cluster_with_multiple_members_with_the_same_name_tree
+    cluster_tree = ElementTree.fromstring(cluster_xml)
+    cluster_with_cfxp_tree = ElementTree.fromstring(cluster_with_cfxp_xml)
+    cluster_with_multiple_members_with_the_same_name_tree = \
+        ElementTree.fromstring(cluster_with_multiple_members_with_the_same_name)
+
+
 class ClusterTests(unittest.TestCase):
-    def setUp(self):
-        tree = ElementTree.fromstring(cluster_xml)
-        self.testRegister = _parse_type(tree)
+    @classmethod
+    def setUpClass(cls):
+        # The tests only read the register, so it is shared by the class.
+        cls.testRegister = _parse_type(cluster_tree)
 
     def test_cluster_zero_data(self):
         data = self.testRegister.unpack_data(0)
-        expected_data = \
-            {'Input Cluster U16': 0,
-             'output cluster 2': {'Input Cluster FXP 4-bit Signed': (False, 0),
-                                  'Input Cluster  U8': 0,
-                                  'Input Cluster U64': 0,
-                                  'Input Cluster I8': 0},
-             'output cluster array': [{'Input Cluster FXP 64-bit Signed Overflow 2': (False, 0),
-                                       'Input Cluster I16 2': 0,
-                                       'Input Cluster FXP 32-bit Unsigned Overflow 2': (False, 0),
-                                       'Input Cluster Bool 2': False},
-                                      {'Input Cluster FXP 64-bit Signed Overflow 2': (False, 0),
-                                       'Input Cluster I16 2': 0,
-                                       'Input Cluster FXP 32-bit Unsigned Overflow 2': (False, 0),
-                                       'Input Cluster Bool 2': False}],
-             'Input Cluster I32': 0,
-             'Input Cluster EnumU8': 0,
-             'Input Cluster U32': 0,
-             'output fxp array': [0, 0]}
-        assert data == expected_data
-        packed_data = self.testRegister.pack_data(expected_data, 0)
+        assert data == expected_zero_data
+        packed_data = self.testRegister.pack_data(expected_zero_data, 0)
         assert packed_data == 0
 
     def test_cluster_values_set_to_1(self):
-        actual_data = 389948983317742165538549719682430202967988854558358925786670372898282524917257258819755320125926426630253986178278732200331444480
-        data = self.testRegister.unpack_data(actual_data)
-        expected_data = \
-            {'Input Cluster U16': 1,
-             'output cluster 2': {'Input Cluster FXP 4-bit Signed': (False, 1),
-                                  'Input Cluster  U8': 1,
-                                  'Input Cluster U64': 1,
-                                  'Input Cluster I8': 1},
-             'output cluster array': [{'Input Cluster FXP 64-bit Signed Overflow 2': (False, 1),
-                                       'Input Cluster I16 2': 1,
-                                       'Input Cluster FXP 32-bit Unsigned Overflow 2': (False, 1),
-                                       'Input Cluster Bool 2': True},
-                                      {'Input Cluster FXP 64-bit Signed Overflow 2': (False, 1),
-                                       'Input Cluster I16 2': 1,
-                                       'Input Cluster FXP 32-bit Unsigned Overflow 2': (False, 1),
-                                       'Input Cluster Bool 2': True}],
-             'Input Cluster I32': 1,
-             'Input Cluster EnumU8': 1,
-             'Input Cluster U32': 1,
-             'output fxp array': [1, 1]}
-        assert data == expected_data
-        packed_data = self.testRegister.pack_data(expected_data, 0)
-        assert packed_data == actual_data
+        data = self.testRegister.unpack_data(packed_values_set_to_1_data)
+        assert data == expected_values_set_to_1_data
+        packed_data = self.testRegister.pack_data(expected_values_set_to_1_data, 0)
+        assert packed_data == packed_values_set_to_1_data
 
     def test_cluster_random_data(self):
-        actual_data = 650140623102406731927256098101662313669128987008919352549838047850309849438881231947219947572849073945363668902620592607917571840
-        data = self.testRegister.unpack_data(actual_data)
-        expected_cluster = \
-            {'Input Cluster U16': 1,
-             'output cluster 2': {'Input Cluster FXP 4-bit Signed': (True, -1),
-                                  'Input Cluster  U8': 7,
-                                  'Input Cluster U64': 4564564654564654,
-                                  'Input Cluster I8': -32},
-             'output cluster array': [{'Input Cluster FXP 64-bit Signed Overflow 2': (False, -11111),
-                                       'Input Cluster I16 2': -1,
-                                       'Input Cluster FXP 32-bit Unsigned Overflow 2': (True, 17.5),
-                                       'Input Cluster Bool 2': False},
-                                      {'Input Cluster FXP 64-bit Signed Overflow 2': (True, 797979),
-                                       'Input Cluster I16 2': 0,
-                                       'Input Cluster FXP 32-bit Unsigned Overflow 2': (False, 1000.75),
-                                       'Input Cluster Bool 2': True}],
-             'Input Cluster I32': 1919919,
-             'Input Cluster EnumU8': 0,
-             'Input Cluster U32': 4294967295,
-             'output fxp array': [0, -1]}
-        assert data == expected_cluster
-        packed_data = self.testRegister.pack_data(expected_cluster, 0)
-        assert packed_data == actual_data
+        data = self.testRegister.unpack_data(packed_random_data)
+        assert data == expected_random_data
+        packed_data = self.testRegister.pack_data(expected_random_data, 0)
+        assert packed_data == packed_random_data
+
+    def test_cluster_can_be_pickled(self):
+        register = pickle.loads(pickle.dumps(self.testRegister))
+        assert register.unpack_data(packed_random_data) == expected_random_data
+        assert register.pack_data(expected_random_data, 0) == packed_random_data
 
     def test_unsupported_type(self):
-        tree = ElementTree.fromstring(cluster_with_cfxp_xml)
         with self.assertRaises(UnsupportedTypeError):
-            self.testRegister = _parse_type(tree)
+            _parse_type(cluster_with_cfxp_tree)
 
     def test_error_when_multiple_members(self):
-        tree = ElementTree.fromstring(cluster_with_multiple_members_with_the_same_name)
         with self.assertRaises(ClusterMustContainUniqueNames):
-            self.testRegister = _parse_type(tree)
+            _parse_type(cluster_with_multiple_members_with_the_same_name_tree)
@@ -1,10 +1,15 @@
-from decimal import Decimal, getcontext
+from decimal import Decimal, localcontext
+import ctypes
 from nifpga import DataType
 from nifpga.bitfile import _FXP
+from nifpga.session import _FIFODataAccessor
 from nifpga.tests.test_nifpga import assert_warns
 import unittest
 
-getcontext().prec = 100
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class MockFxp(_FXP):
@@ -17,13 +22,15 @@ class MockFxp(_FXP):
         self._word_length = word_length
         self._integer_word_length = integer_word_length
         self._delta = self._calculate_delta()
+        self._decimal_context = self._calculate_decimal_context()
         self._minimum = self._calculate_minimum()
         self._maximum = self._calculate_maximum()
         self._overflow_enabled = enableOverflowStatus
         self._size_in_bits = self._calculate_size_in_bits()
         self._data_mask = (1 << self._size_in_bits) - 1
         self._word_length_mask = (1 << self._word_length) - 1
-        self._signed_bit_mask = 1 << (self._word_length - 1)
+        self._signed_bit_mask = 1 << (self._word_length - 1) if signed else 0
+        self._integer_shift = self._calculate_integer_shift()
         self.set_register_attributes()
 
     def set_register_attributes(self):
@@ -47,6 +54,19 @@ class FXPRegisterAsserts(object):
         actual = register.unpack_data(read_value)
         self._test.assertEqual(actual, expected_value)
 
+    def assert_fxp_value_converted_to_raw_value(self,
+                                                register,
+                                                read_value,
+                                                expected_value):
+        actual = register.unpack_data_raw(read_value)
+        if register._overflow_enabled:
+            self._test.assertEqual(actual[0], expected_value[0])
+            actual = actual[1]
+            expected_value = expected_value[1]
+        self._test.assertIsInstance(actual, int)
+        self._test.assertEqual(register._decimal_context.multiply(actual, register._delta),
+                               expected_value)
+
     def assert_user_input_converted_to_fxp(self,
                                            register,
                                            user_input,
@@ -70,35 +90,115 @@ def _calculate_maximum_fxp_value(register):
     return (2**(magnitude_bits) - 1)
 
 
-""" These are a couple of arbitrary binary strings that the following unit
-to test a non random value.
+""" These are a couple of arbitrary binary values that the following unit
+tests read to test a non random value.
 """
-binary_string_16bit = '1110010010010110'  # 2's comp = 0001101101101010
-binary_string_32bit = '01000101100100100011000100001100'
+fxp_value_16bit = 0b1110010010010110  # 2's comp = 0001101101101010
+# (0) 0100 0101 1001 0010 0011 0001 0000 1100, i.e. the overflow bit clear
+fxp_value_32bit = 0b01000101100100100011000100001100
+# (1) followed by the 32 bit value twice, i.e. the overflow bit set
+fxp_value_64bit = (1 << 64) | (fxp_value_32bit << 32) | fxp_value_32bit
 
 positive_integer = 42  # Arbitrary constant used in some tests
 
+# The values each register below is expected to convert those values to.
+user_value_16bit_word_16bit_integer = \
+    Decimal(2**(15) + 2**(14) + 2**(13) + 2**(10)
+            + 2**(7) + 2**(4) + 2**(2) + 2**(1))
+user_value_16bit_word_16bit_integer_signed = \
+    Decimal((-1) * (2**(12) + 2**(11) + 2**(9) + 2**(8)
+                    + 2**(6) + 2**(5) + 2**(3) + 2**(1)))
+user_value_15bit_word_15bit_integer_overflow = \
+    (True, Decimal(2**(14) + 2**(13) + 2**(10) + 2**(7)
+                   + 2**(4) + 2**(2) + 2**(1)))
+user_value_15bit_word_15bit_integer_signed_overflow = \
+    (True, Decimal((-1) * (2**(12) + 2**(11) + 2**(9)
+                           + 2**(8) + 2**(6) + 2**(5)
+                           + 2**(3) + 2**(1))))
+user_value_16bit_word_0bit_integer = \
+    Decimal(2**(-1) + 2**(-2) + 2**(-3) + 2**(-6)
+            + 2**(-9) + 2**(-12) + 2**(-14) + 2**(-15))
+user_value_15bit_word_0bit_integer_overflow = \
+    (True, Decimal(2**(-1) + 2**(-2) + 2**(-5) + 2**(-8)
+                   + 2**(-11) + 2**(-13) + 2**(-14)))
+user_value_15bit_word_0bit_integer_signed_overflow = \
+    (True, Decimal((-1) * (2**(-3) + 2**(-4) + 2**(-6)
+                           + 2**(-7) + 2**(-9) + 2**(-10)
+                           + 2**(-12) + 2**(-14))))
+user_value_32bit_word_16bit_integer_overflow = \
+    (False, Decimal(2**(1) + 2**(4) + 2**(7) + 2**(8)
+                    + 2**(10) + 2**(14) + 2**(-3)
+                    + 2**(-4) + 2**(-8) + 2**(-13)
+                    + 2**(-14)))
+user_value_16bit_word_100bit_integer = \
+    Decimal(2**(99) + 2**(98) + 2**(97) + 2**(94)
+            + 2**(91) + 2**(88) + 2**(86) + 2**(85))
+user_value_16bit_word_negative_100bit_integer = \
+    Decimal(2**(-101) + 2**(-102) + 2**(-103) + 2**(-106)
+            + 2**(-109) + 2**(-112) + 2**(-114)
+            + 2**(-115))
+user_value_64bit_word_64bit_integer_overflow = \
+    (True, Decimal(5013123263993360652))
+
 
 class FXPRegisterSharedTests(unittest.TestCase):
+    # The registers are only read by the tests, so each class builds its
+    # register once and setUp only needs to bind the asserts to the test.
+    @classmethod
+    def setUpClass(cls):
+        cls.testRegister = MockFxp(signed=False,
+                                   enableOverflowStatus=False,
+                                   word_length=1,
+                                   integer_word_length=1)
+        cls.fxp_value = 0b1
+        cls.user_value = Decimal(1)
+
     def setUp(self):
-        self.testRegister = MockFxp(signed=False,
-                                    enableOverflowStatus=False,
-                                    word_length=1,
-                                    integer_word_length=1)
         self.FxpAssert = FXPRegisterAsserts(self)
-        self.fxp_value = int('1', 2)
-        self.user_value = Decimal(1)
 
     def test_converting_fxp_to_decimal_value(self):
         self.FxpAssert.assert_fxp_value_converted_to_decimal(self.testRegister,
                                                              self.fxp_value,
                                                              self.user_value)
 
+    def test_converting_fxp_to_raw_value(self):
+        self.FxpAssert.assert_fxp_value_converted_to_raw_value(self.testRegister,
+                                                               self.fxp_value,
+                                                               self.user_value)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_converting_many_fxp_values_at_once(self):
+        # the overflow bit of a 64 bit word doesn't fit in a uint64 element
+        element_mask = (1 << 64) - 1
+        read_values = [self.fxp_value & element_mask, 0, element_mask,
+                       self.testRegister._word_length_mask]
+        expected = [self.testRegister.unpack_data(value) for value in read_values]
+        actual = self.testRegister.unpack_many(numpy.array(read_values, dtype=numpy.uint64))
+        self.assertEqual(expected, actual)
+
+    def test_reading_fxp_values_from_a_fifo(self):
+        element_mask = (1 << 64) - 1
+        read_values = [self.fxp_value & element_mask, 0, element_mask]
+        buf = (ctypes.c_uint64 * len(read_values))(*read_values)
+        accessor = _FIFODataAccessor(buf, self.testRegister, 8, len(read_values))
+        expected = [self.testRegister.unpack_data(value) for value in read_values]
+        self.assertEqual(expected, list(accessor))
+
     def test_converting_user_data_into_binary(self):
         self.FxpAssert.assert_user_input_converted_to_fxp(self.testRegister,
                                                           self.user_value,
                                                           self.fxp_value)
 
+    def test_conversions_do_not_depend_on_the_decimal_context(self):
+        with localcontext() as context:
+            context.prec = 3
+            self.FxpAssert.assert_fxp_value_converted_to_decimal(self.testRegister,
+                                                                 self.fxp_value,
+                                                                 self.user_value)
+            self.FxpAssert.assert_user_input_converted_to_fxp(self.testRegister,
+                                                              self.user_value,
+                                                              self.fxp_value)
+
     def test_user_input_less_than_minimum(self):
         less_than_minimum = self.testRegister._minimum - positive_integer
         expected_value = _calculate_minimum_fxp_value(self.testRegister)
@@ -129,40 +229,36 @@ class FXPRegisterSharedTests(unittest.TestCase):
 
 
 class FXPRegister16bitWord16bitInteger(FXPRegisterSharedTests):
-    def setUp(self):
-        self.testRegister = MockFxp(signed=False,
-                                    enableOverflowStatus=False,
-                                    word_length=16,
-                                    integer_word_length=16)
-        self.FxpAssert = FXPRegisterAsserts(self)
-        self.fxp_value = int(binary_string_16bit, 2)
-        self.user_value = Decimal(2**(15) + 2**(14) + 2**(13) + 2**(10)
-                                  + 2**(7) + 2**(4) + 2**(2) + 2**(1))
+    @classmethod
+    def setUpClass(cls):
+        cls.testRegister = MockFxp(signed=False,
+                                   enableOverflowStatus=False,
+                                   word_length=16,
+                                   integer_word_length=16)
+        cls.fxp_value = fxp_value_16bit
+        cls.user_value = user_value_16bit_word_16bit_integer
 
 
 class FXPRegister16bitWord16bitIntegerSigned(FXPRegisterSharedTests):
-    def setUp(self):
-        self.testRegister = MockFxp(signed=True,
-                                    enableOverflowStatus=False,
-                                    word_length=16,
-                                    integer_word_length=16)
-        self.FxpAssert = FXPRegisterAsserts(self)
-        self.fxp_value = int(binary_string_16bit, 2)
-        self.user_value = Decimal((-1) * (2**(12) + 2**(11) + 2**(9) + 2**(8)
-                                          + 2**(6) + 2**(5) + 2**(3) + 2**(1)))
+    @classmethod
+    def setUpClass(cls):
+        cls.testRegister = MockFxp(signed=True,
+                                   enableOverflowStatus=False,
+                                   word_length=16,
+                                   integer_word_length=16)
+        cls.fxp_value = fxp_value_16bit
+        cls.user_value = user_value_16bit_word_16bit_integer_signed
 
 
 class FXPRegister15bitWord15bitIntegerOverflow(FXPRegisterSharedTests):
-
-    def setUp(self):
-        self.testRegister = MockFxp(signed=False,
-                                    enableOverflowStatus=True,
-                                    word_length=15,
-                                    integer_word_length=15)
-        self.FxpAssert = FXPRegisterAsserts(self)
-        self.fxp_value = int(binary_string_16bit, 2)
-        self.user_value = (True, Decimal(2**(14) + 2**(13) + 2**(10) + 2**(7)
-                                         + 2**(4) + 2**(2) + 2**(1)))
+    @classmethod
+    def setUpClass(cls):
+        cls.testRegister = MockFxp(signed=False,
+                                   enableOverflowStatus=True,
+                                   word_length=15,
+                                   integer_word_length=15)
+        cls.fxp_value = fxp_value_16bit
+        cls.user_value = user_value_15bit_word_15bit_integer_overflow
 
     def test_converting_user_data_without_overflow_use_false(self):
         fxp_with_false_overflow = self.fxp_value - 2**self.testRegister._word_length
@@ -172,20 +268,18 @@ class FXPRegister15bitWord15bitIntegerOverflow(FXPRegisterSharedTests):
 
 
 class FXPRegister15bitWord15bitIntegerSignedOverflow(FXPRegisterSharedTests):
-    def setUp(self):
-        self.testRegister = MockFxp(signed=True,
-                                    enableOverflowStatus=True,
-                                    word_length=15,
-                                    integer_word_length=15)
-        self.FxpAssert = FXPRegisterAsserts(self)
-        self.fxp_value = int(binary_string_16bit, 2)
-        self.user_value = (True, Decimal((-1) * (2**(12) + 2**(11) + 2**(9)
-                                                 + 2**(8) + 2**(6) + 2**(5)
-                                                 + 2**(3) + 2**(1))))
+    @classmethod
+    def setUpClass(cls):
+        cls.testRegister = MockFxp(signed=True,
+                                   enableOverflowStatus=True,
+                                   word_length=15,
+                                   integer_word_length=15)
+        cls.fxp_value = fxp_value_16bit
+        cls.user_value = user_value_15bit_word_15bit_integer_signed_overflow
 
     def test_overflow_bit_is_not_calculated_in_twos_compliment(self):
         # Create a 15 bit word that is all 1's
-        value = int('1' * (self.testRegister._word_length + 1), 2)
+        value = (1 << (self.testRegister._word_length + 1)) - 1
         result = self.testRegister.unpack_data(value)
         """ The expected value of overflow(1) 111 1111 1111 1111, would
         expect -1 and an overflow. as the twos complement of the non-overflow
@@ -195,89 +289,94 @@ class FXPRegister15bitWord15bitIntegerSignedOverflow(FXPRegisterSharedTests):
 
 
 class FXPRegister16bitWord0bitInteger(FXPRegisterSharedTests):
-    def setUp(self):
-        self.testRegister = MockFxp(signed=False,
-                                    enableOverflowStatus=False,
-                                    word_length=16,
-                                    integer_word_length=0)
-        self.FxpAssert = FXPRegisterAsserts(self)
-        self.fxp_value = int(binary_string_16bit, 2)
-        self.user_value = Decimal(2**(-1) + 2**(-2) + 2**(-3) + 2**(-6)
-                                  + 2**(-9) + 2**(-12) + 2**(-14) + 2**(-15))
+    @classmethod
+    def setUpClass(cls):
+        cls.testRegister = MockFxp(signed=False,
+                                   enableOverflowStatus=False,
+                                   word_length=16,
+                                   integer_word_length=0)
+        cls.fxp_value = fxp_value_16bit
+        cls.user_value = user_value_16bit_word_0bit_integer
 
 
 class FXPRegister15bitWord0bitIntegerOverflow(FXPRegisterSharedTests):
-    def setUp(self):
-        self.testRegister = MockFxp(signed=False,
-                                    enableOverflowStatus=True,
-                                    word_length=15,
-                                    integer_word_length=0)
-        self.FxpAssert = FXPRegisterAsserts(self)
-        self.fxp_value = int(binary_string_16bit, 2)
-        self.user_value = (True, Decimal(2**(-1) + 2**(-2) + 2**(-5) + 2**(-8)
-                                         + 2**(-11) + 2**(-13) + 2**(-14)))
+    @classmethod
+    def setUpClass(cls):
+        cls.testRegister = MockFxp(signed=False,
+                                   enableOverflowStatus=True,
+                                   word_length=15,
+                                   integer_word_length=0)
+        cls.fxp_value = fxp_value_16bit
+        cls.user_value = user_value_15bit_word_0bit_integer_overflow
 
 
 class FXPRegister15bitWord0bitIntegerSignedOverflow(FXPRegisterSharedTests):
-    def setUp(self):
-        self.testRegister = MockFxp(signed=True,
-                                    enableOverflowStatus=True,
-                                    word_length=15,
-                                    integer_word_length=0)
-        self.FxpAssert = FXPRegisterAsserts(self)
-        self.fxp_value = int(binary_string_16bit, 2)
-        self.user_value = (True, Decimal((-1) * (2**(-3) + 2**(-4) + 2**(-6)
-                                                 + 2**(-7) + 2**(-9) + 2**(-10)
-                                                 + 2**(-12) + 2**(-14))))
+    @classmethod
+    def setUpClass(cls):
+        cls.testRegister = MockFxp(signed=True,
+                                   enableOverflowStatus=True,
+                                   word_length=15,
+                                   integer_word_length=0)
+        cls.fxp_value = fxp_value_16bit
+        cls.user_value = user_value_15bit_word_0bit_integer_signed_overflow
 
 
 class FXPRegister32bitWord16bitIntegerOverflow(FXPRegisterSharedTests):
-    def setUp(self):
-        self.testRegister = MockFxp(signed=False,
-                                    enableOverflowStatus=True,
-                                    word_length=32,
-                                    integer_word_length=16)
-        self.FxpAssert = FXPRegisterAsserts(self)
+    @classmethod
+    def setUpClass(cls):
+        cls.testRegister = MockFxp(signed=False,
+                                   enableOverflowStatus=True,
+                                   word_length=32,
+                                   integer_word_length=16)
         """ binary String '(0) 0100010110010010.0011000100001100' """
-        self.fxp_value = int('0' + binary_string_32bit, 2)
-        self.user_value = (False, Decimal(2**(1) + 2**(4) + 2**(7) + 2**(8)
-                                          + 2**(10) + 2**(14) + 2**(-3)
-                                          + 2**(-4) + 2**(-8) + 2**(-13)
-                                          + 2**(-14)))
+        cls.fxp_value = fxp_value_32bit
+        cls.user_value = user_value_32bit_word_16bit_integer_overflow
 
 
 class FXPRegister16bitWord100bitInteger(FXPRegisterSharedTests):
-    def setUp(self):
-        self.testRegister = MockFxp(signed=False,
-                                    enableOverflowStatus=False,
-                                    word_length=16,
-                                    integer_word_length=100)
-        self.FxpAssert = FXPRegisterAsserts(self)
-        self.fxp_value = int(binary_string_16bit, 2)
-        self.user_value = Decimal(2**(99) + 2**(98) + 2**(97) + 2**(94)
-                                  + 2**(91) + 2**(88) + 2**(86) + 2**(85))
+    @classmethod
+    def setUpClass(cls):
+        cls.testRegister = MockFxp(signed=False,
+                                   enableOverflowStatus=False,
+                                   word_length=16,
+                                   integer_word_length=100)
+        cls.fxp_value = fxp_value_16bit
+        cls.user_value = user_value_16bit_word_100bit_integer
 
 
 class FXPRegister16bitWordNegative100bitInteger(FXPRegisterSharedTests):
-    def setUp(self):
-        self.testRegister = MockFxp(signed=False,
-                                    enableOverflowStatus=False,
-                                    word_length=16,
-                                    integer_word_length=-100)
-        self.FxpAssert = FXPRegisterAsserts(self)
-        self.fxp_value = int(binary_string_16bit, 2)
-        self.user_value = Decimal(2**(-101) + 2**(-102) + 2**(-103) + 2**(-106)
-                                  + 2**(-109) + 2**(-112) + 2**(-114)
-                                  + 2**(-115))
+    @classmethod
+    def setUpClass(cls):
+        cls.testRegister = MockFxp(signed=False,
+                                   enableOverflowStatus=False,
+                                   word_length=16,
+                                   integer_word_length=-100)
+        cls.fxp_value = fxp_value_16bit
+        cls.user_value = user_value_16bit_word_negative_100bit_integer
 
 
 class FXPRegister64bitWord64bitIntegerOverflow(FXPRegisterSharedTests):
-    def setUp(self):
-        self.testRegister = MockFxp(signed=False,
-                                    enableOverflowStatus=True,
-                                    word_length=64,
-                                    integer_word_length=64)
-        self.FxpAssert = FXPRegisterAsserts(self)
+    @classmethod
+    def setUpClass(cls):
+        cls.testRegister = MockFxp(signed=False,
+                                   enableOverflowStatus=True,
+                                   word_length=64,
+                                   integer_word_length=64)
         """(1) 0100 0101 1001 0010 0011 0001 0000 1100 0100 0101 1001 0010 0011 0001 0000 1100 """
-        self.fxp_value = int('1' + binary_string_32bit + binary_string_32bit, 2)
-        self.user_value = (True, Decimal(5013123263993360652))
+        cls.fxp_value = fxp_value_64bit
+        cls.user_value = user_value_64bit_word_64bit_integer_overflow
+
+
+class FXPRegister64bitWordNegative1024bitInteger(FXPRegisterSharedTests):
+    """ The smallest delta LabVIEW allows, 2**-1088, is too small for a
+    float. """
+    @classmethod
+    def setUpClass(cls):
+        cls.testRegister = MockFxp(signed=True,
+                                   enableOverflowStatus=False,
+                                   word_length=64,
+                                   integer_word_length=-1024)
+        cls.fxp_value = 3
+        with localcontext() as context:
+            context.prec = 1000  # enough to hold 3 * 2**-1088 exactly
+            cls.user_value = 3 / Decimal(2) ** 1088
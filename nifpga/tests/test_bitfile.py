@@ -1,27 +1,45 @@
 import unittest
 import os
+import pickle
 import nifpga
+from functools import lru_cache
 
 BITFILE_ALL_REGISTERS = 'nifpga/tests/allregistertypes.lvbitx'
 
 
+@lru_cache(maxsize=None)
+def _load_bitfile_contents(path):
+    """ Parses each bitfile once, the tests only read from it. """
+    with open(path, 'r') as f:
+        return nifpga.Bitfile(f.read(), parse_contents=True)
+
+
 class BitfileTest(unittest.TestCase):
     def test_parse_from_path(self):
         bitfile = nifpga.Bitfile(BITFILE_ALL_REGISTERS)
         self.assertEqual(bitfile.filepath, os.path.abspath(BITFILE_ALL_REGISTERS))
 
     def test_parse_from_contents(self):
-        with open(BITFILE_ALL_REGISTERS, 'r') as f:
+        bitfile = _load_bitfile_contents(BITFILE_ALL_REGISTERS)
+        self.assertTrue(bitfile.filepath is None)
+
+    def test_parse_from_bytes_contents(self):
+        with open(BITFILE_ALL_REGISTERS, 'rb') as f:
             bitfile = nifpga.Bitfile(f.read(), parse_contents=True)
-            self.assertTrue(bitfile.filepath is None)
+        self.assertTrue(bitfile.filepath is None)
+        self.assertEqual(bitfile.signature, _load_bitfile_contents(BITFILE_ALL_REGISTERS).signature)
 
     def test_parse_bitfile_with_fxp_fifo(self):
-        with open(BITFILE_ALL_REGISTERS, 'r') as f:
-            bitfile = nifpga.Bitfile(f.read(), parse_contents=True)
-            bitfile.fifos["FXP FIFO"]
+        bitfile = _load_bitfile_contents(BITFILE_ALL_REGISTERS)
+        self.assertIn("FXP FIFO", bitfile.fifos)
 
     def test_parse_bitfile_with_fxp_register_array(self):
-        with open(BITFILE_ALL_REGISTERS, 'r') as f:
-            bitfile = nifpga.Bitfile(f.read(), parse_contents=True)
-            print(bitfile.registers)
-            bitfile.registers["output fxp array"]
+        bitfile = _load_bitfile_contents(BITFILE_ALL_REGISTERS)
+        self.assertIn("output fxp array", bitfile.registers)
+
+    def test_bitfile_can_be_pickled(self):
+        bitfile = _load_bitfile_contents(BITFILE_ALL_REGISTERS)
+        unpickled = pickle.loads(pickle.dumps(bitfile))
+        self.assertEqual(bitfile.signature, unpickled.signature)
+        self.assertEqual(sorted(bitfile.registers), sorted(unpickled.registers))
+        self.assertEqual(sorted(bitfile.fifos), sorted(unpickled.fifos))
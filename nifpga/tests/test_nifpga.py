@@ -1,12 +1,21 @@
 import ctypes
+import ctypes.util
 import mock
+import pickle
 import unittest
 import sys
+import xml.etree.ElementTree as ElementTree
 import warnings
 from contextlib import contextmanager
 from nose import SkipTest
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 import nifpga
+from nifpga.bitfile import _parse_type
 from nifpga.statuscheckedlibrary import (check_status,
                                          NamedArgtype,
                                          LibraryFunctionInfo,
@@ -80,6 +89,28 @@ class NiFpgaStatusExceptionTest(unittest.TestCase):
             else:
                 self.assertIn("a bogus string argument: b'I am a string'", exception_str)
 
+    def test_non_ctypes_argument_with_value_member_is_not_unwrapped(self):
+        class HasValue(object):
+            value = 0x1234
+
+            def __str__(self):
+                return "HasValue"
+
+        exception = nifpga.FifoTimeoutError(function_name="Dummy Function Name",
+                                            argument_names=["thing"],
+                                            function_args=(HasValue(),))
+        self.assertIn("thing: HasValue", str(exception))
+
+    def test_status_exceptions_can_be_pickled(self):
+        exception = nifpga.FifoTimeoutError(function_name="Dummy Function Name",
+                                            argument_names=["session", "fifo"],
+                                            function_args=(ctypes.c_int32(0x0000beef), 0x0000f1f0))
+        unpickled = pickle.loads(pickle.dumps(exception))
+        self.assertIs(type(unpickled), nifpga.FifoTimeoutError)
+        self.assertEqual(-50400, unpickled.get_code())
+        self.assertEqual(0x0000beef, unpickled.get_args()["session"])
+        self.assertEqual(str(exception), str(unpickled))
+
     def test_status_exceptions_can_be_pickled_across_processes(self):
         try:
             import jobrunner
@@ -164,6 +195,38 @@ class StatusCheckedLibraryTestCRunTime(unittest.TestCase):
         with self.assertRaises(nifpga.UnknownError):
             self._c_runtime.c_atoi(b"-1")
 
+    def test_library_path_skips_finding_library_by_name(self):
+        c_runtime = StatusCheckedLibrary(
+            "NotARealLibraryName",
+            library_function_infos=[
+                LibraryFunctionInfo(
+                    pretty_name="c_atoi",
+                    name_in_library="atoi",
+                    named_argtypes=[
+                        NamedArgtype("nptr", ctypes.c_char_p),
+                    ])
+            ],
+            library_path=ctypes.util.find_library("c"))
+        with self.assertRaises(nifpga.UnknownError):
+            c_runtime.c_atoi(b"-1")
+
+    def test_libraries_sharing_a_path_keep_their_own_argtypes(self):
+        # the second library declares atoi differently; the loaded library
+        # is shared, but the first library's atoi must be unaffected
+        StatusCheckedLibrary(
+            "c",
+            library_function_infos=[
+                LibraryFunctionInfo(
+                    pretty_name="c_atoi",
+                    name_in_library="atoi",
+                    named_argtypes=[
+                        NamedArgtype("nptr", ctypes.c_char_p),
+                        NamedArgtype("unused", ctypes.c_int),
+                    ])
+            ])
+        self._c_runtime.c_atoi(b"0")
+        self._c_runtime["c_atoi"](b"0")
+
     def test_get_unknown_warning(self):
         with warnings.catch_warnings(record=True) as w:
             self._c_runtime.c_atoi(b"1")
@@ -218,6 +281,9 @@ class StatusCheckedLibraryTestMockedLibrary(unittest.TestCase):
     def shortDescription(self):
         return None
 
+    # don't reuse a library loaded by a previous test's mocks
+    @mock.patch.dict('nifpga.statuscheckedlibrary._library_paths', clear=True)
+    @mock.patch.dict('nifpga.statuscheckedlibrary._loaded_libraries', clear=True)
     @mock.patch('nifpga.statuscheckedlibrary.ctypes.util.find_library')
     @mock.patch('nifpga.statuscheckedlibrary.ctypes.cdll')
     def setUp(self, mock_cdll, mock_find_library):
@@ -226,11 +292,13 @@ class StatusCheckedLibraryTestMockedLibrary(unittest.TestCase):
         can be called, and the return value can be changed by setting
         self._mock_awesome_function.return_value.
         """
-        mock_loaded_library = mock.Mock()
+        mock_loaded_library = mock.MagicMock()
         mock_cdll.LoadLibrary.return_value = mock_loaded_library
         self._mock_awesome_function = mock.Mock()
         self._mock_awesome_function.__name__ = "Entrypoint_AwesomeFunction"
-        mock_loaded_library.Entrypoint_AwesomeFunction = self._mock_awesome_function
+        # functions are looked up by indexing the library, i.e. library[name]
+        mock_loaded_library.__getitem__.side_effect = \
+            {"Entrypoint_AwesomeFunction": self._mock_awesome_function}.__getitem__
         self._library = StatusCheckedLibrary(
             library_name="CoolLibrary",
             library_function_infos=[
@@ -274,7 +342,13 @@ class StatusCheckedLibraryTestMockedLibrary(unittest.TestCase):
             self._library.AwesomeFunction(ctypes.c_uint32(33))
             self.fail("AwesomeFunction should have raised TypeError")
         except TypeError as e:
-            self.assertEqual("Entrypoint_AwesomeFunction takes exactly 2 arguments (1 given)", str(e))
+            self.assertIn("Entrypoint_AwesomeFunction", str(e))
+
+    def test_error_if_too_many_arguments(self):
+        """ ctypes allows extra arguments, but the wrapper must not """
+        self._mock_awesome_function.return_value = 0
+        with self.assertRaises(TypeError):
+            self._library.AwesomeFunction(ctypes.c_uint32(33), ctypes.c_char_p(b"2"), 3)
 
 
 class NiFpgaTest(unittest.TestCase):
@@ -287,3 +361,163 @@ class NiFpgaTest(unittest.TestCase):
             nifpga.nifpga._NiFpga()
         except LibraryNotFoundError:
             pass
+
+
+class CompositeFifoByteConversionTest(unittest.TestCase):
+    def assert_round_trips(self, data, transfer_size_bytes, size_in_bits, expected_bytes):
+        buf = (ctypes.c_uint8 * (2 * transfer_size_bytes))()
+        nifpga.session._convert_to_u8_array(buf, transfer_size_bytes, data, transfer_size_bytes, size_in_bits)
+        self.assertEqual(bytes(transfer_size_bytes) + expected_bytes, bytes(buf))
+        self.assertEqual(data, nifpga.session._combine_array_of_u8_into_one_value(buf, transfer_size_bytes, transfer_size_bytes, size_in_bits))
+
+    def test_one_byte(self):
+        self.assert_round_trips(0xa5, 1, 8, b"\xa5")
+
+    def test_two_bytes(self):
+        self.assert_round_trips(0x1234, 2, 16, b"\x34\x12")
+
+    def test_one_word(self):
+        self.assert_round_trips(0x12345678, 4, 32, b"\x78\x56\x34\x12")
+
+    def test_words_are_swapped_and_left_justified(self):
+        # 40 bits are shifted up to fill 8 bytes; the most significant word
+        # comes first and each word is little endian
+        self.assert_round_trips(0x123456789a, 8, 40, b"\x78\x56\x34\x12\x00\x00\x00\x9a")
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class NumpyArrayFifoTest(unittest.TestCase):
+    """
+    The driver can't be loaded on a dev machine, so the FIFOs are given a
+    mocked library and we check what the array APIs hand to the driver.
+    """
+    def make_fifo(self, fifo_class, datatype, transfer_size_bytes):
+        bitfile_fifo = mock.Mock()
+        bitfile_fifo.datatype = datatype
+        bitfile_fifo.number = 3
+        bitfile_fifo.name = "Array FIFO"
+        bitfile_fifo.transfer_size_bytes = transfer_size_bytes
+        fifo = fifo_class(session=mock.sentinel.session,
+                          nifpga=mock.MagicMock(),
+                          bitfile_fifo=bitfile_fifo)
+        fifo._write_func = mock.Mock()
+        fifo._read_func = mock.Mock()
+        return fifo
+
+    def make_u32_fifo(self):
+        return self.make_fifo(nifpga.session._FIFO, nifpga.DataType.U32, 4)
+
+    def make_composite_fifo(self):
+        return self.make_fifo(nifpga.session._DataConvertingFifo, nifpga.DataType.Cluster, 8)
+
+    def test_write_array_hands_the_array_memory_to_the_driver(self):
+        fifo = self.make_u32_fifo()
+        array = numpy.arange(5, dtype=numpy.uint32)
+        fifo.write_array(array, timeout_ms=10)
+        (session, number, data, count, timeout_ms, remaining), _ = fifo._write_func.call_args
+        self.assertIs(mock.sentinel.session, session)
+        self.assertEqual(3, number)
+        self.assertIsInstance(data, ctypes.POINTER(ctypes.c_uint32))
+        self.assertEqual(array.ctypes.data, ctypes.addressof(data.contents))
+        self.assertEqual(5, count)
+        self.assertEqual(10, timeout_ms)
+
+    def test_read_array_reads_as_many_elements_as_the_array_holds(self):
+        fifo = self.make_u32_fifo()
+        array = numpy.zeros(7, dtype=numpy.uint32)
+        fifo.read_array(array)
+        (_, _, data, count, _, _), _ = fifo._read_func.call_args
+        self.assertIsInstance(data, ctypes.POINTER(ctypes.c_uint32))
+        self.assertEqual(array.ctypes.data, ctypes.addressof(data.contents))
+        self.assertEqual(7, count)
+
+    def test_array_with_the_wrong_dtype_is_rejected(self):
+        fifo = self.make_u32_fifo()
+        with self.assertRaises(TypeError):
+            fifo.write_array(numpy.zeros(4, dtype=numpy.int32))
+        with self.assertRaises(TypeError):
+            fifo.read_array(numpy.zeros(4, dtype=numpy.uint64))
+        # smaller elements would let the driver write past the array's end
+        with self.assertRaises(TypeError):
+            fifo.read_array(numpy.zeros(4, dtype=numpy.uint8))
+        self.assertFalse(fifo._write_func.called)
+        self.assertFalse(fifo._read_func.called)
+
+    def test_array_that_is_not_contiguous_is_rejected(self):
+        fifo = self.make_u32_fifo()
+        array = numpy.zeros(8, dtype=numpy.uint32)[::2]
+        with self.assertRaises(ValueError):
+            fifo.write_array(array)
+        with self.assertRaises(ValueError):
+            fifo.read_array(array)
+
+    def test_read_only_array_is_rejected_by_read_array(self):
+        fifo = self.make_u32_fifo()
+        array = numpy.frombuffer(bytes(16), dtype=numpy.uint32)
+        with self.assertRaises(ValueError):
+            fifo.read_array(array)
+        self.assertFalse(fifo._read_func.called)
+        # writing only reads from the array
+        fifo.write_array(array)
+        self.assertTrue(fifo._write_func.called)
+
+    def test_composite_arrays_pass_the_bytes_per_element(self):
+        fifo = self.make_composite_fifo()
+        array = numpy.zeros(24, dtype=numpy.uint8)
+        fifo.write_array(array)
+        (_, _, data, bytes_per_element, count, _, _), _ = fifo._write_func.call_args
+        self.assertIsInstance(data, ctypes.POINTER(ctypes.c_uint8))
+        self.assertEqual(8, bytes_per_element)
+        self.assertEqual(3, count)
+        fifo.read_array(array)
+        (_, _, data, bytes_per_element, count, _, _), _ = fifo._read_func.call_args
+        self.assertEqual(array.ctypes.data, ctypes.addressof(data.contents))
+        self.assertEqual(8, bytes_per_element)
+        self.assertEqual(3, count)
+
+    def test_composite_array_with_a_partial_element_is_rejected(self):
+        fifo = self.make_composite_fifo()
+        array = numpy.zeros(20, dtype=numpy.uint8)
+        with self.assertRaises(ValueError):
+            fifo.write_array(array)
+        with self.assertRaises(ValueError):
+            fifo.read_array(array)
+        self.assertFalse(fifo._write_func.called)
+        self.assertFalse(fifo._read_func.called)
+
+
+fxp_64bit_with_overflow_xml = """
+<FXP>
+    <Name>fxp</Name>
+    <Signed>false</Signed>
+    <WordLength>64</WordLength>
+    <IntegerWordLength>64</IntegerWordLength>
+    <IncludeOverflowStatus>true</IncludeOverflowStatus>
+</FXP>
+"""
+
+
+class FifoRegionWriteTest(unittest.TestCase):
+    """
+    Acquired FIFO regions are viewed through a memoryview, which rejects
+    values ctypes buffers silently wrap around, so writes must wrap them.
+    """
+    def make_accessor(self, type_xml, format_char, number_of_elements=2):
+        buffer = memoryview(bytearray(8 * number_of_elements)).cast(format_char)
+        return nifpga.session._FIFODataAccessor(buffer, _parse_type(ElementTree.fromstring(type_xml)),
+                                                8, number_of_elements)
+
+    def test_integer_out_of_range_wraps_like_ctypes(self):
+        accessor = self.make_accessor("<I64><Name>i64</Name></I64>", 'q')
+        accessor[0] = 2**63
+        accessor[1] = 5
+        self.assertEqual(ctypes.c_int64(2**63).value, accessor[0])
+        self.assertEqual(5, accessor[1])
+
+    def test_fxp_overflow_bit_of_64bit_word_is_dropped_like_write(self):
+        accessor = self.make_accessor(fxp_64bit_with_overflow_xml, 'Q')
+        accessor[0] = (True, 5)
+        buf = (ctypes.c_uint64 * 1)()
+        buf[0] = accessor._type.pack_data((True, 5), 0)
+        self.assertEqual(buf[0], accessor._buffer[0])
+        self.assertEqual((False, 5), accessor[0])
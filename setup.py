@@ -1,27 +1,25 @@
 from setuptools import setup, find_packages
 import os
 
+here = os.path.dirname(os.path.realpath(__file__))
+
+
 # The VERSION file is codegned by the build.
 # setup.py needs to be in version control, but checking versions into that is problematic
 def get_version():
-    version = None
-    script_dir = os.path.dirname(os.path.realpath(__file__))
-    script_dir = os.path.join(script_dir, "nifpga")
-    if not os.path.exists(os.path.join(script_dir, "VERSION")):
-        version = "1.0.0.dev0"
-    else:
-        with open(os.path.join(script_dir, "VERSION"), "r") as version_file:
-            version = version_file.read().rstrip()
-    return version
+    try:
+        with open(os.path.join(here, "nifpga", "VERSION"), "r") as version_file:
+            return version_file.read().rstrip()
+    except FileNotFoundError:
+        return "1.0.0.dev0"
 
 
 def get_long_description():
-    this_dir = os.path.dirname(os.path.abspath(__file__))
-    if not os.path.exists("README.md"):
-        return ""
-    else:
-        with open(os.path.join(this_dir, "README.md")) as readme:
+    try:
+        with open(os.path.join(here, "README.md")) as readme:
             return readme.read().strip()
+    except FileNotFoundError:
+        return ""
 
 
 setup(name="nifpga",
@@ -31,6 +29,7 @@ setup(name="nifpga",
       version=get_version(),
       packages=find_packages(),
       install_requires=['future'],
+      extras_require={'numpy': ['numpy>=1.17']},
       python_requires=">3.4",
       package_data={'nifpga': ['VERSION']},
       author="National Instruments",